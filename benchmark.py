@@ -0,0 +1,157 @@
+"""Benchmarks for the parse -> fit -> score -> plot pipeline
+
+Runs each fitting_engine stage on synthetic Gamma samples of increasing size,
+recording wall time and peak traced memory. Results can be saved as JSON and
+compared against an earlier run to catch regressions:
+
+    python benchmark.py --sizes 100 10000 1000000 -o baseline.json
+    python benchmark.py --sizes 100 10000 1000000 --baseline baseline.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import scipy
+from matplotlib.figure import Figure
+
+import fitting_engine as engine
+from fitting_engine import DISTRIBUTIONS
+
+DEFAULT_SIZES = [10 ** k for k in range(2, 8)]
+
+# Slowdowns below this many seconds are treated as timer noise
+NOISE_FLOOR = 0.005
+
+def measure(func, *args, repeat=1, **kwargs):
+    """Run func `repeat` times untraced, then once more traced
+    
+    Returns (result, best seconds, peak traced bytes). tracemalloc slows
+    allocation-heavy code unevenly, so timings come only from the untraced
+    runs and the peak from the separate traced one.
+    """
+    best, result = np.inf, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, best, peak
+
+def render_plot(data, dist_obj, params, dist_name, summary):
+    """plot_distribution plus PNG rasterization, as the app does per rerun"""
+    fig = Figure(figsize=(10, 7))
+    engine.plot_distribution(data, dist_obj, params, dist_name, fig.subplots(), summary)
+    fig.savefig(io.BytesIO(), format='png')
+
+def run_benchmarks(sizes, dist_names, repeat=1, seed=0, log=print):
+    """Time every stage at every size and return a list of result records"""
+    rng = np.random.default_rng(seed)
+    results = []
+    
+    def record(stage, n, seconds, peak, distribution=None):
+        results.append({'stage': stage, 'distribution': distribution, 'n': n,
+                        'seconds': seconds, 'peak_bytes': peak})
+        label = f"{stage}[{distribution}]" if distribution else stage
+        log(f"{label:<24} n={n:<10} {seconds * 1000:10.2f} ms {peak / 2 ** 20:10.1f} MiB")
+    
+    for n in sizes:
+        sample = rng.gamma(3.0, 2.0, size=n) + 1.0
+        text = ', '.join(map(repr, sample.tolist()))
+        
+        data, seconds, peak = measure(engine.parse_data, text, repeat=repeat)
+        record('parse', n, seconds, peak)
+        del text
+        
+        summary, seconds, peak = measure(engine.DataSummary, data, repeat=repeat)
+        record('summary', n, seconds, peak)
+        
+        for name in dist_names:
+            dist_obj = DISTRIBUTIONS[name]['dist']
+            try:
+                params, seconds, peak = measure(engine.fit_distribution, data, dist_obj, repeat=repeat)
+            except Exception as e:
+                log(f"fit[{name}] n={n} failed: {e}")
+                continue
+            record('fit', n, seconds, peak, name)
+            
+            _, seconds, peak = measure(engine.calculate_fit_quality, data, dist_obj, params, summary,
+                                       repeat=repeat)
+            record('score', n, seconds, peak, name)
+        
+        dist_obj = DISTRIBUTIONS['Gamma']['dist']
+        params = engine.fit_distribution(data, dist_obj)
+        _, seconds, peak = measure(render_plot, data, dist_obj, params, 'Gamma', summary, repeat=repeat)
+        record('plot', n, seconds, peak)
+    return results
+
+def environment():
+    """Versions and hardware the numbers were measured on"""
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+def compare(results, baseline, tolerance):
+    """Return (record, baseline seconds) pairs that got slower than tolerance allows"""
+    reference = {(r['stage'], r['distribution'], r['n']): r['seconds'] for r in baseline['results']}
+    regressions = []
+    for r in results:
+        before = reference.get((r['stage'], r['distribution'], r['n']))
+        if before is None:
+            continue
+        if r['seconds'] > before * (1 + tolerance) and r['seconds'] - before > NOISE_FLOOR:
+            regressions.append((r, before))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the parse/fit/score/plot pipeline.")
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+                        help="sample sizes (default: 10^2 to 10^7)")
+    parser.add_argument('-d', '--distributions', nargs='+', choices=list(DISTRIBUTIONS),
+                        default=list(DISTRIBUTIONS), metavar='NAME',
+                        help="distributions to fit (default: all)")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per measurement; the fastest is kept")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for the synthetic samples")
+    parser.add_argument('-o', '--output', help="write results as JSON to this file")
+    parser.add_argument('--baseline', help="JSON results from an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed slowdown vs baseline as a fraction (default: 0.2)")
+    args = parser.parse_args(argv)
+    
+    results = run_benchmarks(args.sizes, args.distributions, args.repeat, args.seed)
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for r, before in regressions:
+            label = f"{r['stage']}[{r['distribution']}]" if r['distribution'] else r['stage']
+            print(f"REGRESSION {label} n={r['n']}: {before * 1000:.2f} ms -> {r['seconds'] * 1000:.2f} ms",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against baseline", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Per-rerun stage timing, cache hit/miss tracking and structured timing logs
+
+Has no Streamlit dependency. The app starts a RerunTimer for each script run
+(and one per fragment rerun). Work anywhere below it is wrapped in
+`stage(...)`, and cached function bodies call `cache_miss()` so that each
+cached stage is reported as a hit or a miss. Finished runs are logged as one
+JSON line each on the 'histograms.timing' logger, and profile_run wraps a
+run in cProfile when profiling is switched on. Running this module on
+such a log prints latency percentiles per stage:
+
+    python diagnostics.py timing.log
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger('histograms.timing')
+
+# Each Streamlit session runs its script in its own thread
+_local = threading.local()
+
+# Held while a profile_run is active; only one profiler may run per process
+_profile_lock = threading.Lock()
+
+class RerunTimer:
+    """Collects stage timings for one script run or fragment rerun"""
+    
+    def __init__(self, name, session_id=None):
+        self.name = name
+        self.session_id = session_id
+        self.stages = []
+        self._open = []
+        self._parent = None
+        self._started = None
+    
+    def start(self, started=None):
+        """Become the thread's active timer, discarding any left by an aborted run
+        
+        `started` is a time.perf_counter() reading to time the run from, if
+        it began before the timer could be created; by default, now.
+        """
+        self._parent = None
+        self._started = time.perf_counter() if started is None else started
+        _local.timer = self
+        return self
+    
+    def finish(self):
+        """Stop timing; fold into the enclosing timer, or log if there is none"""
+        _local.timer = self._parent
+        if self._parent is not None:
+            self._parent.stages.extend(self.stages)
+        else:
+            self.log()
+    
+    def __enter__(self):
+        parent = getattr(_local, 'timer', None)
+        self.start()
+        self._parent = parent
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.finish()
+        return False
+    
+    def mark(self, name):
+        """Record a milestone, e.g. first paint, as the time since the run started"""
+        self.stages.append({'stage': name, 'ms': round(self.elapsed_ms, 3), 'cache': None})
+    
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self._started) * 1000
+    
+    def log(self):
+        logger.info(json.dumps({
+            'run': self.name,
+            'session': self.session_id,
+            'total_ms': round(self.elapsed_ms, 3),
+            'stages': self.stages
+        }))
+
+@contextmanager
+def stage(name, cached=False):
+    """Time the enclosed block as a stage of the active RerunTimer, if any
+    
+    With cached=True the stage is reported as a cache 'miss' if any cached
+    function body ran inside it (see cache_miss), otherwise as a 'hit'.
+    """
+    timer = getattr(_local, 'timer', None)
+    if timer is None:
+        yield
+        return
+    
+    record = {'stage': name, 'ms': None, 'cache': None, '_misses': 0}
+    timer._open.append(record)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['ms'] = round((time.perf_counter() - start) * 1000, 3)
+        timer._open.pop()
+        if cached:
+            record['cache'] = 'miss' if record['_misses'] else 'hit'
+        del record['_misses']
+        timer.stages.append(record)
+
+def cache_miss():
+    """Mark every open stage as having computed something instead of hitting a cache"""
+    timer = getattr(_local, 'timer', None)
+    if timer is not None:
+        for record in timer._open:
+            record['_misses'] += 1
+
+@contextmanager
+def profile_run(profiler, path):
+    """Run the block under cProfile `profiler`, then dump its accumulated stats to `path`
+    
+    The profiler is disabled and dumped however the block exits, including
+    an interrupted Streamlit rerun. Only one profiler can be active in a
+    process (Python 3.12+ raises ValueError for a second), so if another
+    profile_run or profiling tool is active the block runs unprofiled.
+    Yields whether the block is being profiled.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        yield False
+        return
+    try:
+        try:
+            profiler.enable()
+        except ValueError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            profiler.disable()
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            profiler.dump_stats(path)
+    finally:
+        _profile_lock.release()
+
+def configure_timing_log(target):
+    """Send timing records to a file, or to stderr when target is '-'"""
+    handler = logging.StreamHandler() if target == '-' else logging.FileHandler(target)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+def latency_percentiles(lines, percentiles=(50, 90, 99)):
+    """Aggregate JSON timing lines into {stage: {count, p50, p90, ...}} in ms"""
+    samples = {}
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        samples.setdefault(f"[{entry['run']} total]", []).append(entry['total_ms'])
+        for record in entry['stages']:
+            samples.setdefault(record['stage'], []).append(record['ms'])
+    return {
+        name: {'count': len(values),
+               **{f'p{p}': float(np.percentile(values, p)) for p in percentiles}}
+        for name, values in samples.items()
+    }
+
+def main(argv=None):
+    paths = (argv if argv is not None else sys.argv[1:]) or ['-']
+    lines = []
+    for path in paths:
+        if path == '-':
+            lines.extend(sys.stdin)
+        else:
+            with open(path) as f:
+                lines.extend(f)
+    
+    summary = latency_percentiles(lines)
+    print(f"{'stage':<32}{'count':>8}{'p50 ms':>12}{'p90 ms':>12}{'p99 ms':>12}")
+    for name, row in sorted(summary.items()):
+        print(f"{name:<32}{row['count']:>8}{row['p50']:>12.2f}{row['p90']:>12.2f}{row['p99']:>12.2f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""Distribution fits run as background jobs with timeouts and cancellation
+
+Each job runs fitting_engine.fit_distribution in its own worker process, so a
+fit whose optimizer hangs is killed when it runs past its timeout or is no
+longer wanted, instead of blocking the caller indefinitely. A failed job keeps
+the reason it failed. Nothing here depends on Streamlit: the app keeps one
+FitJobQueue per session and polls it, and shares finished results between
+sessions through a FitResultCache.
+
+Workers are limited for the whole process, not per queue, and a reaper thread
+collects finished workers and kills those past their deadline whether or not
+anyone is polling. Dropping a queue kills its outstanding jobs.
+"""
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import fitting_engine as engine
+
+# Seconds a single fit may run before its worker is killed
+FIT_TIMEOUT = 30.0
+
+# Fits running at the same time across every queue in the process
+FIT_JOB_WORKERS = os.cpu_count() or 1
+
+# Seconds between checks on running jobs while waiting
+POLL_INTERVAL = 0.05
+
+# Seconds between the reaper thread's checks on every running job
+REAP_INTERVAL = 0.25
+
+# Worker slots shared by all queues, and the jobs holding one
+_worker_slots = threading.BoundedSemaphore(FIT_JOB_WORKERS)
+_running_jobs = set()
+_running_lock = threading.Lock()
+_reaper = None
+
+def _reap_forever():
+    while True:
+        time.sleep(REAP_INTERVAL)
+        with _running_lock:
+            jobs = list(_running_jobs)
+        for job in jobs:
+            job._check()
+
+def _ensure_reaper():
+    global _reaper
+    with _running_lock:
+        if _reaper is None:
+            _reaper = threading.Thread(target=_reap_forever, name='fit-job-reaper', daemon=True)
+            _reaper.start()
+
+def _cancel_jobs(jobs):
+    # Finalizer of a dropped FitJobQueue; must not reference the queue itself
+    for job in list(jobs.values()):
+        job._stop('cancelled', "Cancelled")
+
+def _fit_worker(conn, data, dist_obj, fit_options):
+    """Worker process entry point: send back ('done', params) or ('failed', reason)"""
+    try:
+        conn.send(('done', engine.fit_distribution(data, dist_obj, **fit_options)))
+    except Exception as e:
+        conn.send(('failed', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+class FitJob:
+    """One fit and its state
+    
+    status is 'pending', 'running', 'done', 'failed', 'timeout' or
+    'cancelled'. params is set when done; error says why otherwise.
+    """
+    
+    FINISHED = ('done', 'failed', 'timeout', 'cancelled')
+    
+    def __init__(self, key, data, dist_obj, fit_options, timeout, group=None):
+        self.key = key
+        self.group = group
+        self.dist_name = dist_obj.name
+        self.timeout = timeout
+        self.status = 'pending'
+        self.params = None
+        self.error = None
+        self.started = None
+        self.ended = None
+        self._args = (data, dist_obj, dict(fit_options))
+        self._process = None
+        self._conn = None
+        self._reported = False
+        self._lock = threading.Lock()
+    
+    @property
+    def finished(self):
+        return self.status in self.FINISHED
+    
+    @property
+    def elapsed(self):
+        """Seconds the job has been running (or ran), 0 while pending"""
+        if self.started is None:
+            return 0.0
+        return (self.ended if self.ended is not None else time.monotonic()) - self.started
+    
+    def _start(self):
+        # The caller holds a worker slot, which _release gives back
+        _ensure_reaper()
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(
+            target=_fit_worker, args=(sender, *self._args), daemon=True,
+            name=f"fit-{self.dist_name}"
+        )
+        self._process.start()
+        sender.close()
+        self._conn = receiver
+        self._args = None
+        self.status = 'running'
+        self.started = time.monotonic()
+        with _running_lock:
+            _running_jobs.add(self)
+    
+    def _check(self):
+        """Collect the result, or kill the worker past its deadline; True if finished"""
+        with self._lock:
+            if self.status != 'running':
+                return self.finished
+            return self._check_running()
+    
+    def _check_running(self):
+        if self._conn.poll():
+            try:
+                self.status, payload = self._conn.recv()
+            except EOFError:
+                self.status, payload = 'failed', "Fit worker exited without a result"
+            if self.status == 'done':
+                self.params = payload
+            else:
+                self.error = payload
+        elif not self._process.is_alive():
+            self.status = 'failed'
+            self.error = f"Fit worker exited with code {self._process.exitcode}"
+        elif self.elapsed > self.timeout:
+            self._kill('timeout', f"Timed out after {self.timeout:g}s")
+        else:
+            return False
+        self._release()
+        return True
+    
+    def _stop(self, status, error):
+        """Kill the worker if the job has not finished yet"""
+        with self._lock:
+            if not self.finished:
+                self._kill(status, error)
+    
+    def _kill(self, status, error):
+        if self._process is not None and self._process.is_alive():
+            self._process.kill()
+        self.status = status
+        self.error = error
+        self._release()
+    
+    def _release(self):
+        if self.ended is None:
+            self.ended = time.monotonic()
+        if self._process is not None:
+            self._process.join()
+            self._conn.close()
+            self._process = self._conn = None
+            with _running_lock:
+                _running_jobs.discard(self)
+            _worker_slots.release()
+        self._args = None
+
+class FitJobQueue:
+    """Runs fit jobs in worker processes, as FIT_JOB_WORKERS slots come free
+    
+    Jobs are identified by a caller-chosen key (e.g. data hash, distribution
+    and options) so a later call can pick up a job that is still running.
+    Jobs may be tagged with a group; retain() cancels the group's jobs whose
+    keys are no longer wanted, e.g. after the user changes a selection.
+    Pending jobs start when the queue is next used and a slot is free.
+    """
+    
+    def __init__(self, timeout=FIT_TIMEOUT):
+        self.timeout = timeout
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        weakref.finalize(self, _cancel_jobs, self.jobs)
+    
+    def submit(self, key, data, dist_obj, fit_options=None, group=None, timeout=None):
+        """Queue a fit unless a job with this key already exists; return the job"""
+        with self._lock:
+            job = self.jobs.get(key)
+            if job is None:
+                job = FitJob(key, data, dist_obj, fit_options or {},
+                             timeout if timeout is not None else self.timeout, group)
+                self.jobs[key] = job
+                self._start_pending()
+            return job
+    
+    def poll(self):
+        """Update running jobs and start pending ones; return the jobs that finished since the last poll"""
+        with self._lock:
+            finished = []
+            for job in self.jobs.values():
+                if job._check() and not job._reported:
+                    job._reported = True
+                    finished.append(job)
+            self._start_pending()
+            return finished
+    
+    def wait(self, keys, on_update=None, interval=POLL_INTERVAL):
+        """Block until every job in keys has finished, polling every `interval` seconds
+        
+        on_update(jobs, just_finished) is called after each poll. If it raises,
+        the jobs keep running and the exception propagates.
+        """
+        jobs = [self.jobs[key] for key in keys]
+        while True:
+            just_finished = self.poll()
+            if on_update is not None:
+                on_update(jobs, just_finished)
+            if all(job.finished for job in jobs):
+                return jobs
+            time.sleep(interval)
+    
+    def cancel(self, keys):
+        """Stop and forget the given jobs"""
+        with self._lock:
+            for key in keys:
+                job = self.jobs.pop(key, None)
+                if job is not None:
+                    job._stop('cancelled', "Cancelled")
+            self._start_pending()
+    
+    def retain(self, keys, group):
+        """Cancel and forget every job in `group` whose key is not in `keys`"""
+        keys = set(keys)
+        self.cancel([key for key, job in list(self.jobs.items())
+                     if job.group == group and key not in keys])
+    
+    def close(self):
+        """Cancel everything"""
+        self.cancel(list(self.jobs))
+    
+    def _start_pending(self):
+        for job in self.jobs.values():
+            if job.status == 'pending':
+                if not _worker_slots.acquire(blocking=False):
+                    break
+                try:
+                    job._start()
+                except Exception:
+                    _worker_slots.release()
+                    raise
+
+class FitResultCache:
+    """Thread-safe LRU map of fit key -> params, shared by every session"""
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            params = self._entries.get(key)
+            if params is not None:
+                self._entries.move_to_end(key)
+            return params
+    
+    def put(self, key, params):
+        with self._lock:
+            self._entries[key] = params
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,1618 @@
+"""Headless distribution fitting engine
+
+Parsing, fitting, scoring and plotting with no Streamlit dependency, so the
+same code serves the web app (streamlit_app.py), the batch CLI (batch_fit.py)
+and any other pipeline. The app layers its caches on top of these functions.
+"""
+import hashlib
+import importlib
+import io
+import os
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import as_completed
+
+import numpy as np
+
+class _LazyModule:
+    """Stand-in for a module that is imported on first attribute access
+    
+    Keeps importing this engine cheap, so the app can paint before scipy and
+    pandas have loaded. The import itself is thread-safe (importlib's module
+    locks), and the loaded module is shared by the whole process.
+    """
+    
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+def lazy_import(name):
+    """Return a stand-in for module `name` that imports it when first used"""
+    return _LazyModule(name)
+
+pd = lazy_import('pandas')
+stats = lazy_import('scipy.stats')
+optimize = lazy_import('scipy.optimize')
+
+# ============================================================================
+# DISTRIBUTION DEFINITIONS (10+ Types Required)
+# ============================================================================
+
+class _Distribution(dict):
+    """DISTRIBUTIONS entry whose 'dist' scipy object is looked up on first access"""
+    
+    def __init__(self, scipy_name, params):
+        super().__init__(params=params)
+        self.scipy_name = scipy_name
+    
+    def __missing__(self, key):
+        if key != 'dist':
+            raise KeyError(key)
+        self['dist'] = getattr(stats, self.scipy_name)
+        return self['dist']
+
+DISTRIBUTIONS = {
+    'Normal': _Distribution('norm', ['loc', 'scale']),
+    'Gamma': _Distribution('gamma', ['a', 'loc', 'scale']),
+    'Weibull': _Distribution('weibull_min', ['c', 'loc', 'scale']),
+    'Exponential': _Distribution('expon', ['loc', 'scale']),
+    'Lognormal': _Distribution('lognorm', ['s', 'loc', 'scale']),
+    'Beta': _Distribution('beta', ['a', 'b', 'loc', 'scale']),
+    'Chi-Square': _Distribution('chi2', ['df', 'loc', 'scale']),
+    'Uniform': _Distribution('uniform', ['loc', 'scale']),
+    'Logistic': _Distribution('logistic', ['loc', 'scale']),
+    'Pareto': _Distribution('pareto', ['b', 'loc', 'scale']),
+    'Rayleigh': _Distribution('rayleigh', ['loc', 'scale']),
+    'Student-t': _Distribution('t', ['df', 'loc', 'scale'])
+}
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Version of the fitting code, part of every saved result's key. Bump it
+# whenever FIT_STRATEGIES, _fit_exact, fit_weighted or fit_histogram change
+# the parameters they return, so results saved by older code stop matching.
+ENGINE_VERSION = 1
+
+# Rows read per chunk when streaming a column out of a CSV
+CSV_CHUNK_SIZE = 500_000
+
+# Histogram resolution of the data layer in plot_distribution
+PLOT_BINS = 25
+
+# Histogram resolution and start-value subsample size for binned fitting
+BINNED_FIT_BINS = 1000
+BINNED_FIT_SUBSAMPLE = 2000
+
+# Below this many points fit_binned fits exactly: its start is already an
+# exact fit on BINNED_FIT_SUBSAMPLE points, so binning only pays off well
+# above that. Above it, fits use about sqrt(n) bins, up to BINNED_FIT_BINS.
+BINNED_FIT_MIN_POINTS = 20_000
+
+# Upper bound on Beta's shape parameters in binned fits. On data with one
+# unbounded tail Beta tends to a Gamma, and a free optimizer chases b and the
+# scale towards infinity. At this bound the lost log-likelihood is a few units
+# per million points.
+BINNED_BETA_MAX_SHAPE = 1e3
+
+# Bootstrap resamples drawn and fitted together as one worker job
+BOOTSTRAP_BATCH_SIZE = 10
+
+# Successive-halving selection in race_distributions: candidates are first
+# fitted on RACE_INITIAL_SIZE points, each round multiplies the subsample by
+# RACE_ETA and keeps the best 1/RACE_ETA, and RACE_FINALISTS get a full fit
+RACE_INITIAL_SIZE = 500
+RACE_ETA = 3
+RACE_FINALISTS = 3
+
+# Accuracy parameter of QuantileSketch: a sketch holds at most about 3k
+# values and its rank error shrinks roughly as 1/k
+SKETCH_K = 1000
+
+# Significance level of the goodness-of-fit verdict, and the asymptotic
+# critical values of Anderson-Darling and Cramer-von Mises at that level
+# for a fully specified distribution
+FIT_ALPHA = 0.05
+AD_CRITICAL = 2.492
+CVM_CRITICAL = 0.461
+
+# ============================================================================
+# DATA INPUT
+# ============================================================================
+
+class DataParseError(ValueError):
+    """Raised when pasted data contains a token that is not a number"""
+    
+    def __init__(self, token, offset):
+        super().__init__(f"'{token}' at character {offset} is not a number")
+        self.token = token
+        self.offset = offset
+
+def parse_data(data_input):
+    """Parse comma or space-separated data into a float64 array
+    
+    The text is converted in one C-level pass by np.fromstring, without
+    creating a Python object per value. Raises DataParseError pointing at
+    the first bad token.
+    """
+    # Replace commas with spaces so every value is whitespace-delimited
+    data_str = data_input.replace(',', ' ')
+    if not data_str.strip():
+        return np.empty(0)
+    
+    try:
+        return np.fromstring(data_str, dtype=np.float64, sep=' ')
+    except ValueError:
+        pass
+    
+    # Slow path only on failure: locate the offending token
+    values = []
+    for match in re.finditer(r'\S+', data_str):
+        try:
+            values.append(float(match.group()))
+        except ValueError:
+            raise DataParseError(match.group(), match.start()) from None
+    return np.array(values, dtype=np.float64)
+
+class RunningStats:
+    """Count, mean, std, min and max accumulated in a single pass over chunks"""
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._m2 = 0.0
+    
+    def update(self, values, counts=None):
+        """Merge a chunk of values, each occurring counts[i] times if given
+        
+        Uses the Chan et al. parallel variance update.
+        """
+        n = len(values) if counts is None else int(np.sum(counts))
+        if n == 0:
+            return self
+        if counts is None:
+            chunk_mean = float(np.mean(values))
+            chunk_m2 = float(np.sum((values - chunk_mean) ** 2))
+        else:
+            chunk_mean = float(np.average(values, weights=counts))
+            chunk_m2 = float(np.sum(counts * (values - chunk_mean) ** 2))
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, float(np.min(values)))
+        self.max = max(self.max, float(np.max(values)))
+        return self
+    
+    def merge(self, other):
+        """Fold in another RunningStats, e.g. one accumulated by a worker"""
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self._m2 += other._m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+    
+    @property
+    def std(self):
+        """Population standard deviation (ddof=0, same as np.std)"""
+        return np.sqrt(self._m2 / self.count) if self.count else np.nan
+
+class WeightedData:
+    """A sample stored as its distinct values and how often each occurs
+    
+    For quantized or heavily repeated data this takes memory in proportion
+    to the number of distinct values rather than the sample size, and
+    fit_distribution, DataSummary (hence calculate_fit_quality) and the
+    histograms work on it directly at the same cost. Results are the same as
+    for the expanded sample. `values` is sorted and may be float32 (see
+    compact_data); `points` gives them as float64 for computation. len() is
+    the number of observations.
+    """
+    
+    def __init__(self, values, counts):
+        self.values = values
+        self.counts = counts
+        self.count = int(np.sum(counts))
+        for arr in (self.values, self.counts):
+            arr.flags.writeable = False
+    
+    def __len__(self):
+        return self.count
+    
+    @property
+    def points(self):
+        return self.values.astype(np.float64, copy=False)
+    
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.counts.nbytes
+    
+    def stats(self):
+        return RunningStats().update(self.points, self.counts)
+    
+    def expand(self):
+        """The full sample as a float64 array, in sorted order"""
+        return np.repeat(self.points, self.counts)
+    
+    def merge(self, other):
+        """A new WeightedData holding the observations of both"""
+        values, inverse = np.unique(np.concatenate([self.points, other.points]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([self.counts, other.counts]),
+                             minlength=len(values)).astype(np.int64)
+        downcast = all(part.values.dtype == np.float32 or not len(part.values) for part in (self, other))
+        return _weighted_data(values, counts, downcast)
+
+def _weighted_data(values, counts, downcast):
+    # Store float32 only when every value converts back to exactly the same
+    # float64, so computations on `points` see the original data
+    if downcast and len(values):
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow.astype(np.float64), values):
+            values = narrow
+    return WeightedData(values, counts)
+
+def compact_data(data, downcast=False):
+    """Reduce an array to WeightedData: distinct values and their counts, NaNs dropped
+    
+    With downcast=True the values are stored as float32 when every one of
+    them is exactly representable there (e.g. integers up to 2**24, or
+    multiples of 1/2**k in range), halving their memory without changing
+    any result.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    values, counts = np.unique(data[~np.isnan(data)], return_counts=True)
+    return _weighted_data(values, counts.astype(np.int64), downcast)
+
+def read_csv_columns(file, columns, chunksize=CSV_CHUNK_SIZE, compact=False, downcast=False):
+    """Stream several CSV columns in one chunked pass
+    
+    Returns {column: (values, RunningStats)}. Only the requested columns are
+    parsed (usecols) and at most `chunksize` rows are materialized at a time,
+    so memory does not grow with the number of other columns in the file.
+    With compact=True the values are WeightedData, merged chunk by chunk, so
+    memory grows with the number of distinct values instead of rows, and
+    downcast is passed to compact_data. `file` may be a path or a file object.
+    """
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    chunks = {column: [] for column in columns}
+    running = {column: RunningStats() for column in columns}
+    compacted = {column: compact_data(np.empty(0)) for column in columns}
+    for chunk in pd.read_csv(file, usecols=list(columns), chunksize=chunksize):
+        for column in columns:
+            values = chunk[column].dropna().to_numpy(dtype=np.float64)
+            running[column].update(values)
+            if compact:
+                compacted[column] = compacted[column].merge(compact_data(values, downcast))
+            else:
+                chunks[column].append(values)
+    if compact:
+        return {column: (compacted[column], running[column]) for column in columns}
+    return {column: (np.concatenate(chunks[column]) if chunks[column] else np.empty(0), running[column])
+            for column in columns}
+
+def read_csv_column(file, column, chunksize=CSV_CHUNK_SIZE, compact=False, downcast=False):
+    """Stream one CSV column in chunks, returning its values and RunningStats"""
+    return read_csv_columns(file, [column], chunksize, compact, downcast)[column]
+
+class FileTail:
+    """Reads the numbers appended to a text file since the previous read
+    
+    Only the new bytes are read and parsed, so each read costs time in
+    proportion to what was appended. A trailing token without a separator
+    after it may still be being written and is held back until the next read.
+    If the file shrinks (truncated or replaced), reading starts over.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self._partial = ''
+    
+    def read_new(self):
+        """Return a float64 array of the values appended since the last call"""
+        if os.path.getsize(self.path) < self.offset:
+            self.offset, self._partial = 0, ''
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        self.offset += len(chunk)
+        
+        text = self._partial + chunk.decode('utf-8', errors='replace')
+        cut = max(text.rfind(sep) for sep in '\n\r\t ,') + 1
+        self._partial = text[cut:]
+        return parse_data(text[:cut])
+
+class StreamingHistogram:
+    """Histogram of equal-width bins that grows to cover each new batch
+    
+    Bins are aligned to multiples of `width`. When covering a batch would
+    need more than max_bins bins, neighbouring pairs are merged and the width
+    doubles, so memory stays bounded and an update costs O(batch + bins).
+    """
+    
+    def __init__(self, max_bins=BINNED_FIT_BINS):
+        self.max_bins = max_bins
+        self.width = None
+        self.first = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+    
+    @property
+    def edges(self):
+        return (self.first + np.arange(len(self.counts) + 1)) * self.width
+    
+    def update(self, values):
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return self
+        low, high = float(np.min(values)), float(np.max(values))
+        if self.width is None:
+            # Start with a quarter of the bins so the range has room to grow
+            span = high - low
+            self.width = span / (self.max_bins // 4) if span > 0 else max(abs(low), 1.0) / self.max_bins
+            self.first = int(np.floor(low / self.width))
+        
+        while True:
+            first = min(self.first, int(np.floor(low / self.width)))
+            last = max(self.first + len(self.counts) - 1, int(np.floor(high / self.width)))
+            if last - first + 1 <= self.max_bins:
+                break
+            self._double()
+        
+        self.counts = np.concatenate([
+            np.zeros(self.first - first, dtype=np.int64), self.counts,
+            np.zeros(last - self.first - len(self.counts) + 1, dtype=np.int64)
+        ])
+        self.first = first
+        index = np.floor(values / self.width).astype(np.int64) - first
+        self.counts += np.bincount(np.clip(index, 0, len(self.counts) - 1), minlength=len(self.counts))
+        return self
+    
+    def _double(self):
+        # Pad to an even-aligned, even-length run of bins, then merge pairs
+        if self.first % 2:
+            self.counts = np.concatenate([[0], self.counts])
+            self.first -= 1
+        if len(self.counts) % 2:
+            self.counts = np.concatenate([self.counts, [0]])
+        self.counts = self.counts.reshape(-1, 2).sum(axis=1)
+        self.first //= 2
+        self.width *= 2
+    
+    def density(self, max_bins=None):
+        """(edges, density) with at most max_bins bins, merging neighbours if needed"""
+        counts, edges = self.counts, self.edges
+        if max_bins is not None and len(counts) > max_bins:
+            group = -(-len(counts) // max_bins)
+            counts = np.concatenate([counts, np.zeros(-len(counts) % group, dtype=np.int64)])
+            counts = counts.reshape(-1, group).sum(axis=1)
+            edges = (self.first + np.arange(0, group * len(counts) + 1, group)) * self.width
+        total = counts.sum()
+        return edges, counts / (total * np.diff(edges)) if total else counts.astype(float)
+
+class DataStream:
+    """Summary of data arriving in batches, updated in time proportional to each batch
+    
+    Keeps RunningStats, a StreamingHistogram and a uniform reservoir sample
+    (Algorithm R) of up to reservoir_size values; the raw history is not
+    stored. refit() fits to the histogram counts, so its cost does not grow
+    with the number of values seen.
+    """
+    
+    def __init__(self, max_bins=BINNED_FIT_BINS, reservoir_size=BINNED_FIT_SUBSAMPLE, seed=0):
+        self.stats = RunningStats()
+        self.histogram = StreamingHistogram(max_bins)
+        self.reservoir = np.empty(0)
+        self.reservoir_size = reservoir_size
+        self._rng = np.random.default_rng(seed)
+    
+    @property
+    def count(self):
+        return self.stats.count
+    
+    def append(self, values):
+        """Fold a batch of values into the summary"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        
+        # Fill the reservoir, then replace entries with probability k / t
+        seen = self.stats.count
+        room = self.reservoir_size - len(self.reservoir)
+        if room > 0:
+            self.reservoir = np.concatenate([self.reservoir, values[:room]])
+        rest = values[max(room, 0):]
+        if len(rest):
+            t = seen + max(room, 0) + np.arange(1, len(rest) + 1)
+            slot = (self._rng.random(len(rest)) * t).astype(np.int64)
+            keep = slot < self.reservoir_size
+            self.reservoir[slot[keep]] = rest[keep]
+        
+        self.stats.update(values)
+        self.histogram.update(values)
+        return self
+    
+    def refit(self, dist_obj, start=None):
+        """Binned fit to everything seen so far, warm-started from `start`
+        
+        Without a usable start (e.g. the first fit, or new data outside the
+        previous fit's support) the reservoir sample gives one.
+        """
+        edges = self.histogram.edges
+        if start is None or not _covers(dist_obj, start, edges[0], edges[-1]):
+            start = _fit_exact(np.concatenate([self.reservoir, [edges[0], edges[-1]]]), dist_obj)
+        params = fit_histogram(self.histogram.counts, self.histogram.edges, dist_obj, start)
+        return tuple(float(p) for p in params)
+
+# File extensions read by read_binary_columns, and the format each one holds
+BINARY_FORMATS = {'.npy': 'npy', '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+
+def binary_format(filename):
+    """Return 'npy', 'parquet' or 'arrow' for a binary data file name, else None"""
+    return BINARY_FORMATS.get(os.path.splitext(str(filename))[1].lower())
+
+def _source_buffer(source):
+    """Zero-copy view of an in-memory file, or None if source is a path"""
+    if isinstance(source, (str, os.PathLike)):
+        return None
+    if hasattr(source, 'getbuffer'):
+        return source.getbuffer()
+    source.seek(0)
+    return source.read()
+
+def _open_npy(source):
+    """Load a .npy file without copying: memory-mapped from a path, or viewed in place"""
+    buffer = _source_buffer(source)
+    if buffer is None:
+        return np.load(source, mmap_mode='r')
+    
+    # Parse just the header, then point an array at the bytes that follow it
+    view = memoryview(buffer).cast('B')
+    length_bytes = 2 if view[6] == 1 else 4
+    offset = 8 + length_bytes + int.from_bytes(view[8:8 + length_bytes], 'little')
+    header = io.BytesIO(view[:offset].tobytes())
+    version = np.lib.format.read_magic(header)
+    read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                   else np.lib.format.read_array_header_2_0)
+    shape, fortran_order, dtype = read_header(header)
+    if dtype.hasobject:
+        raise ValueError(".npy files holding Python objects are not supported")
+    array = np.frombuffer(view, dtype=dtype, count=int(np.prod(shape)), offset=offset)
+    array.flags.writeable = False
+    return array.reshape(shape, order='F' if fortran_order else 'C')
+
+def _npy_columns(array):
+    """Numeric column names of a 1-D, 2-D or structured array"""
+    if array.dtype.names:
+        return [name for name in array.dtype.names
+                if np.issubdtype(array.dtype[name], np.number)]
+    if not np.issubdtype(array.dtype, np.number):
+        return []
+    if array.ndim == 1:
+        return ['value']
+    if array.ndim == 2:
+        return [str(i) for i in range(array.shape[1])]
+    raise ValueError(f".npy arrays must be 1-D or 2-D, got shape {array.shape}")
+
+def _npy_column(array, column):
+    if array.dtype.names:
+        return array[column]
+    return array if array.ndim == 1 else array[:, int(column)]
+
+def _arrow_table_source(source):
+    """pyarrow source for a path (memory-mapped) or an in-memory file (wrapped, not copied)"""
+    import pyarrow as pa
+    buffer = _source_buffer(source)
+    if buffer is None:
+        return pa.memory_map(os.fspath(source), 'r')
+    return pa.BufferReader(pa.py_buffer(buffer))
+
+def _open_arrow_ipc(source):
+    """Read an Arrow IPC file or stream; buffers stay in the mapped/uploaded memory"""
+    import pyarrow as pa
+    try:
+        return pa.ipc.open_file(_arrow_table_source(source)).read_all()
+    except pa.ArrowInvalid:
+        return pa.ipc.open_stream(_arrow_table_source(source)).read_all()
+
+def _arrow_schema(source, kind):
+    if kind == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_schema(_arrow_table_source(source))
+    return _open_arrow_ipc(source).schema
+
+def _arrow_values(chunked):
+    """float64 values of an Arrow column, zero-copy when it is one null-free float64 chunk"""
+    import pyarrow as pa
+    chunked = chunked.drop_null()
+    if chunked.type != pa.float64():
+        chunked = chunked.cast(pa.float64())
+    if chunked.num_chunks == 0:
+        return np.empty(0)
+    array = chunked.chunk(0) if chunked.num_chunks == 1 else chunked.combine_chunks()
+    return array.to_numpy(zero_copy_only=False)
+
+def binary_columns(source, kind):
+    """Numeric column names in a .npy, Parquet or Arrow IPC file, read from metadata only"""
+    if kind == 'npy':
+        return _npy_columns(_open_npy(source))
+    import pyarrow as pa
+    schema = _arrow_schema(source, kind)
+    return [field.name for field in schema
+            if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)]
+
+def read_binary_columns(source, kind, columns):
+    """Read numeric columns from a .npy, Parquet or Arrow IPC file
+    
+    Returns {column: (values, RunningStats)} like read_csv_columns. Nothing is
+    parsed: .npy data is memory-mapped (or viewed in the uploaded buffer),
+    Parquet reads only the requested columns' pages, and Arrow IPC buffers
+    are used in place. A float64 column without NaNs or nulls is returned as
+    a read-only view of the file's memory; other columns are converted or
+    filtered into a new array.
+    """
+    if kind == 'npy':
+        array = _open_npy(source)
+        raw = {column: np.asarray(_npy_column(array, column)) for column in columns}
+    elif kind == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(_arrow_table_source(source), columns=list(columns))
+        raw = {column: _arrow_values(table.column(column)) for column in columns}
+    elif kind == 'arrow':
+        table = _open_arrow_ipc(source).select(list(columns))
+        raw = {column: _arrow_values(table.column(column)) for column in columns}
+    else:
+        raise ValueError(f"Unknown binary format: {kind!r}")
+    
+    result = {}
+    for column, values in raw.items():
+        if values.dtype != np.float64 or not values.flags.c_contiguous:
+            values = np.ascontiguousarray(values, dtype=np.float64)
+        missing = np.isnan(values)
+        if missing.any():
+            values = values[~missing]
+        result[column] = (values, RunningStats().update(values))
+    return result
+
+def read_binary_column(source, kind, column):
+    """Read one column of a binary data file, returning its values and RunningStats"""
+    return read_binary_columns(source, kind, [column])[column]
+
+def data_fingerprint(data):
+    """Content hash of a data array, used as the cache key for that dataset"""
+    key = _shared_keys.get(id(data))
+    if key is not None and _shared_datasets.get(key) is data:
+        return key
+    if isinstance(data, WeightedData):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(b'weighted')
+        digest.update(np.ascontiguousarray(data.points))
+        digest.update(np.ascontiguousarray(data.counts))
+        return digest.hexdigest()
+    arr = np.ascontiguousarray(data)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{arr.dtype.str}{arr.shape}".encode())
+    digest.update(arr)
+    return digest.hexdigest()
+
+# Read-only datasets shared process-wide, by content hash, while anyone holds
+# them; _shared_keys remembers each shared array's hash by id()
+_shared_datasets = weakref.WeakValueDictionary()
+_shared_keys = {}
+_shared_lock = threading.Lock()
+
+def share_dataset(data):
+    """Return the one read-only array in this process holding data's contents
+    
+    The first array seen with given contents is marked read-only and becomes
+    the shared copy; later calls with equal contents (e.g. the same file
+    uploaded by another session) return it, so the duplicate can be freed.
+    The shared array's fingerprint is remembered, so data_fingerprint on it
+    costs a dict lookup instead of a hash of the data.
+    """
+    key = data_fingerprint(data)
+    with _shared_lock:
+        shared = _shared_datasets.get(key)
+        if shared is None:
+            shared = data
+            shared.flags.writeable = False
+            _shared_datasets[key] = shared
+            _shared_keys[id(shared)] = key
+            weakref.finalize(shared, _shared_keys.pop, id(shared), None)
+        return shared
+
+# ============================================================================
+# FITTING
+# ============================================================================
+
+# Closed-form maximum-likelihood estimators. Each takes an optional fixed loc
+# and returns None when no closed form applies (e.g. Lognormal with free loc).
+
+def _mle_norm(data, floc=None, weights=None):
+    loc = np.average(data, weights=weights) if floc is None else floc
+    return loc, np.sqrt(np.average((data - loc) ** 2, weights=weights))
+
+def _mle_expon(data, floc=None, weights=None):
+    loc = np.min(data) if floc is None else floc
+    return loc, np.average(data, weights=weights) - loc
+
+def _mle_uniform(data, floc=None, weights=None):
+    loc = np.min(data) if floc is None else floc
+    return loc, np.max(data) - loc
+
+def _mle_lognorm(data, floc=None, weights=None):
+    if floc is None:
+        return None
+    log_data = np.log(data - floc)
+    log_mean = np.average(log_data, weights=weights)
+    return np.sqrt(np.average((log_data - log_mean) ** 2, weights=weights)), floc, np.exp(log_mean)
+
+def _mle_rayleigh(data, floc=None, weights=None):
+    if floc is None:
+        return None
+    return floc, np.sqrt(np.average((data - floc) ** 2, weights=weights) / 2)
+
+# Method-of-moments starting points for the iterative fits. Each returns
+# (shapes, loc, scale), or None when the moments give no usable guess.
+
+def _below_min(data, loc):
+    # A start loc at or above the minimum puts data outside the support
+    data_min, data_max = np.min(data), np.max(data)
+    return min(loc, data_min - 0.01 * (data_max - data_min))
+
+def _start_gamma(data):
+    skew = stats.skew(data)
+    if skew <= 0:
+        return None
+    a = (2 / skew) ** 2
+    scale = np.std(data) / np.sqrt(a)
+    return (a,), _below_min(data, np.mean(data) - a * scale), scale
+
+def _start_chi2(data):
+    skew = stats.skew(data)
+    if skew <= 0:
+        return None
+    df = 8 / skew ** 2
+    scale = np.std(data) / np.sqrt(2 * df)
+    return (df,), _below_min(data, np.mean(data) - df * scale), scale
+
+def _start_weibull(data):
+    # Shift just below the minimum, then match moments of log(x - loc)
+    data_min, data_max = np.min(data), np.max(data)
+    loc = data_min - 0.01 * (data_max - data_min)
+    log_data = np.log(data - loc)
+    c = np.pi / (np.std(log_data) * np.sqrt(6))
+    return (c,), loc, np.exp(np.mean(log_data) + np.euler_gamma / c)
+
+def _start_beta(data):
+    data_min, data_max = np.min(data), np.max(data)
+    pad = 0.01 * (data_max - data_min)
+    loc, scale = data_min - pad, data_max - data_min + 2 * pad
+    unit = (data - loc) / scale
+    mean, var = np.mean(unit), np.var(unit)
+    common = mean * (1 - mean) / var - 1
+    return (mean * common, (1 - mean) * common), loc, scale
+
+def _start_t(data):
+    kurtosis = stats.kurtosis(data)
+    df = 4 + 6 / kurtosis if kurtosis > 0 else 30.0
+    return (df,), np.median(data), np.std(data) * np.sqrt((df - 2) / df)
+
+def _start_pareto(data):
+    # Pick loc so the minimum sits at loc + scale, then use the Hill estimator
+    data_min, data_max = np.min(data), np.max(data)
+    loc = 0.0 if data_min > 0 else data_min - (data_max - data_min)
+    scale = data_min - loc
+    return (len(data) / np.sum(np.log((data - loc) / scale)),), loc, scale
+
+# Fitting strategy per scipy distribution name: an exact 'analytic' estimator,
+# or a 'start' guess handed to the scipy optimizer. Others use scipy defaults.
+# Changing an entry's results needs an ENGINE_VERSION bump.
+FIT_STRATEGIES = {
+    'norm': {'analytic': _mle_norm},
+    'expon': {'analytic': _mle_expon},
+    'uniform': {'analytic': _mle_uniform},
+    'lognorm': {'analytic': _mle_lognorm},
+    'rayleigh': {'analytic': _mle_rayleigh},
+    'gamma': {'start': _start_gamma},
+    'chi2': {'start': _start_chi2},
+    'weibull_min': {'start': _start_weibull},
+    'beta': {'start': _start_beta},
+    't': {'start': _start_t},
+    'pareto': {'start': _start_pareto},
+}
+
+def _fit_exact(data, dist_obj, start=None, **options):
+    """Exact MLE using the distribution's entry in FIT_STRATEGIES, if any
+    
+    `start` is a full parameter tuple (shapes..., loc, scale) to warm-start
+    the optimizer from instead of the strategy's own guess. A warm-started
+    fit is kept when its log-likelihood is finite and no worse than at its
+    start. Otherwise a given `start` is returned as is if the data lies in
+    its support, and only a strategy guess falls back to scipy's defaults.
+    """
+    strategy = FIT_STRATEGIES.get(dist_obj.name, {})
+    
+    if 'analytic' in strategy and set(options) <= {'floc'}:
+        with np.errstate(all='ignore'):
+            params = strategy['analytic'](data, **options)
+        if params is not None and np.all(np.isfinite(params)):
+            return params
+    
+    def log_likelihood(params):
+        with np.errstate(all='ignore'):
+            value = np.sum(dist_obj.logpdf(data, *params))
+        return value if np.isfinite(value) else -np.inf
+    
+    given = None
+    if start is not None and not options and np.all(np.isfinite(start)):
+        given = tuple(start)
+        if log_likelihood(given) == -np.inf:
+            given = None
+    if given is not None:
+        start = (given[:-2], given[-2], given[-1])
+    elif 'start' in strategy and not options:
+        with np.errstate(all='ignore'):
+            start = strategy['start'](data)
+    else:
+        start = None
+    
+    if start is not None and np.all(np.isfinite([*start[0], *start[1:]])):
+        shapes, loc, scale = start
+        try:
+            params = dist_obj.fit(data, *shapes, loc=loc, scale=scale)
+            if log_likelihood(params) > -np.inf and log_likelihood(params) >= log_likelihood((*shapes, loc, scale)):
+                return params
+        except Exception:
+            pass
+    if given is not None:
+        return given
+    
+    # Fall back to scipy's own starting guesses
+    return dist_obj.fit(data, **options)
+
+def fit_binned(data, dist_obj, bins=BINNED_FIT_BINS, start=None):
+    """Maximum-likelihood fit to histogram counts instead of raw points
+    
+    The data is reduced once to about sqrt(n) bin edges and counts, at most
+    `bins`, then fitted with fit_histogram. Start values are `start` if given
+    and its support covers the data, otherwise an exact fit on a small
+    subsample. Samples under BINNED_FIT_MIN_POINTS are fitted exactly, which
+    is faster there.
+    """
+    if len(data) < BINNED_FIT_MIN_POINTS:
+        if isinstance(data, WeightedData):
+            return fit_weighted(data, dist_obj, start=start)
+        return _fit_exact(data, dist_obj, start=start)
+    bins = min(bins, int(np.sqrt(len(data))))
+    if isinstance(data, WeightedData):
+        counts, edges = np.histogram(data.points, bins=bins, weights=data.counts)
+    else:
+        counts, edges = np.histogram(data, bins=bins)
+    if start is None or not _covers(dist_obj, start, edges[0], edges[-1]):
+        start = _subsample_start(data, dist_obj, edges[0], edges[-1])
+    return fit_histogram(counts, edges, dist_obj, start)
+
+def _subsample_start(data, dist_obj, low, high):
+    """Exact fit on a BINNED_FIT_SUBSAMPLE subsample of an array or WeightedData
+    
+    The extremes low and high are included so the start point's support
+    covers all of the data.
+    """
+    rng = np.random.default_rng(0)
+    size = min(len(data), BINNED_FIT_SUBSAMPLE)
+    if isinstance(data, WeightedData):
+        sample = rng.choice(data.points, size=size, p=data.counts / data.count)
+    else:
+        sample = data[rng.integers(0, len(data), size=size)]
+    return _fit_exact(np.concatenate([sample, [low, high]]), dist_obj)
+
+def fit_weighted(data, dist_obj, start=None, **options):
+    """Exact maximum-likelihood fit to WeightedData
+    
+    Distributions with an analytic estimator in FIT_STRATEGIES use its
+    weighted form. Others minimize sum(count_i * -logpdf(value_i)) with
+    Nelder-Mead, from `start` or an exact fit on a subsample, so each
+    iteration costs O(distinct values). Only the floc option is supported.
+    """
+    if set(options) - {'floc'}:
+        raise ValueError(f"Unsupported options for weighted fitting: {sorted(options)}")
+    points, counts = data.points, data.counts
+    strategy = FIT_STRATEGIES.get(dist_obj.name, {})
+    if 'analytic' in strategy:
+        with np.errstate(all='ignore'):
+            params = strategy['analytic'](points, weights=counts, **options)
+        if params is not None and np.all(np.isfinite(params)):
+            return params
+    if options:
+        raise ValueError(f"Weighted fitting of {dist_obj.name} does not support floc")
+    
+    if start is None:
+        start = _subsample_start(data, dist_obj, points[0], points[-1])
+    
+    def neg_log_likelihood(params):
+        with np.errstate(all='ignore'):
+            log_likelihood = np.sum(counts * dist_obj.logpdf(points, *params))
+        return -log_likelihood if np.isfinite(log_likelihood) else np.inf
+    
+    result = optimize.minimize(neg_log_likelihood, start, method='Nelder-Mead',
+                               options={'maxiter': 1000 * len(start)})
+    if not np.isfinite(result.fun):
+        raise RuntimeError(f"Weighted fit of {dist_obj.name} did not converge")
+    return tuple(result.x)
+
+def _covers(dist_obj, params, low, high):
+    """Whether the support of dist_obj(*params) contains [low, high]"""
+    with np.errstate(all='ignore'):
+        support_low, support_high = dist_obj.support(*params)
+    return bool(support_low <= low and support_high >= high)
+
+def fit_histogram(counts, edges, dist_obj, start):
+    """Maximum-likelihood fit of a distribution to histogram counts
+    
+    Maximizes the multinomial log-likelihood sum(n_i * log P(bin i)) starting
+    from the parameter tuple `start`, so each optimizer iteration costs
+    O(bins) however many points were counted. Empty bins contribute nothing
+    and are dropped. Parameters whose support does not contain the
+    occupied bins are rejected, so the fit never excludes data that the
+    bins were counted from.
+    """
+    counts = np.asarray(counts)
+    occupied = counts > 0
+    counts = counts[occupied]
+    lower, upper = edges[:-1][occupied], edges[1:][occupied]
+    
+    bounds = None
+    if dist_obj.name == 'beta':
+        # Clip the start's shapes to the bound, then match its mean and
+        # standard deviation with loc and scale
+        a, b, loc, scale = start
+        clipped_a, clipped_b = min(a, BINNED_BETA_MAX_SHAPE), min(b, BINNED_BETA_MAX_SHAPE)
+        mean, std = stats.beta.mean(a, b, loc, scale), stats.beta.std(a, b, loc, scale)
+        scale = std / stats.beta.std(clipped_a, clipped_b)
+        start = (clipped_a, clipped_b, mean - scale * stats.beta.mean(clipped_a, clipped_b), scale)
+        bounds = [(0, BINNED_BETA_MAX_SHAPE)] * 2 + [(None, None)] * 2
+    
+    def neg_log_likelihood(params):
+        if not _covers(dist_obj, params, lower[0], upper[-1]):
+            return np.inf
+        with np.errstate(all='ignore'):
+            # Use whichever of cdf/sf differences is accurate in this tail,
+            # and fall back to pdf * width where both underflow
+            probs = np.maximum(dist_obj.cdf(upper, *params) - dist_obj.cdf(lower, *params),
+                               dist_obj.sf(lower, *params) - dist_obj.sf(upper, *params))
+            probs = np.where(probs > 0, probs,
+                             dist_obj.pdf((lower + upper) / 2, *params) * (upper - lower))
+        if not np.all(probs > 0):
+            return np.inf
+        return -np.sum(counts * np.log(probs))
+    
+    # Search in units of the start's magnitudes, so the convergence tolerance
+    # is relative whatever the parameters' scale
+    unit = np.where(np.asarray(start) != 0, np.abs(start), 1.0)
+    if bounds is not None:
+        bounds = [(None if low is None else low / u, None if high is None else high / u)
+                  for (low, high), u in zip(bounds, unit)]
+    result = optimize.minimize(lambda x: neg_log_likelihood(x * unit), np.asarray(start) / unit,
+                               method='Nelder-Mead', bounds=bounds,
+                               options={'maxiter': 1000 * len(start)})
+    if not np.isfinite(result.fun):
+        raise RuntimeError(f"Binned fit of {dist_obj.name} did not converge")
+    return tuple(result.x * unit)
+
+def fit_distribution(data, dist_obj, start=None, **fit_options):
+    """Fit distribution to data and return parameters as a tuple of floats
+    
+    Pass method='binned' for fit_binned; any other options go to the exact
+    fit. `start` warm-starts the optimizer from a previous estimate. data may
+    be WeightedData, which is fitted by fit_weighted. Raises whatever the
+    underlying fit raises.
+    """
+    options = dict(fit_options)
+    if options.get('method') == 'binned':
+        del options['method']
+        params = fit_binned(data, dist_obj, start=start, **options)
+    elif isinstance(data, WeightedData):
+        params = fit_weighted(data, dist_obj, start=start, **options)
+    else:
+        params = _fit_exact(data, dist_obj, start=start, **options)
+    return tuple(float(p) for p in params)
+
+def _bootstrap_batch(data, dist_obj, params, seed, size, fit_options):
+    """Fit `size` resamples of data drawn in one vectorized step (worker entry point)
+    
+    Returns a (size, len(params)) array with a row of NaN for each failed fit.
+    """
+    rng = np.random.default_rng(seed)
+    if isinstance(data, WeightedData):
+        # Resampling n observations is a multinomial draw over the distinct values
+        draws = rng.multinomial(data.count, data.counts / data.count, size=size)
+        resamples = [WeightedData(data.values[c > 0], c[c > 0]) for c in draws]
+    else:
+        resamples = data[rng.integers(0, len(data), size=(size, len(data)))]
+    estimates = np.full((size, len(params)), np.nan)
+    for i, resample in enumerate(resamples):
+        try:
+            estimates[i] = fit_distribution(resample, dist_obj, start=params, **fit_options)
+        except Exception:
+            pass
+    return estimates
+
+def bootstrap_fit(data, dist_obj, params, n_resamples=200, executor=None, seed=0,
+                  on_progress=None, batch_size=BOOTSTRAP_BATCH_SIZE, **fit_options):
+    """Refit the distribution to bootstrap resamples of data
+    
+    Resamples are drawn and fitted in batches of `batch_size`, spread over
+    `executor` if given. Each fit is warm-started from `params`, the estimate
+    on the full data. on_progress(done, total) is called as resamples finish;
+    if it raises (e.g. the caller was cancelled) batches not yet started are
+    cancelled and the exception propagates. Returns an (n_resamples,
+    len(params)) array of estimates, NaN where a fit failed.
+    """
+    sizes = [min(batch_size, n_resamples - start) for start in range(0, n_resamples, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    params = tuple(params)
+    
+    if executor is None:
+        batches = []
+        for size, batch_seed in zip(sizes, seeds):
+            batches.append(_bootstrap_batch(data, dist_obj, params, batch_seed, size, fit_options))
+            if on_progress is not None:
+                on_progress(sum(len(b) for b in batches), n_resamples)
+        return np.concatenate(batches) if batches else np.empty((0, len(params)))
+    
+    futures = [executor.submit(_bootstrap_batch, data, dist_obj, params, batch_seed, size, fit_options)
+               for size, batch_seed in zip(sizes, seeds)]
+    try:
+        done = 0
+        for future in as_completed(futures):
+            done += len(future.result())
+            if on_progress is not None:
+                on_progress(done, n_resamples)
+    finally:
+        for future in futures:
+            future.cancel()
+    return np.concatenate([future.result() for future in futures])
+
+def bootstrap_intervals(estimates, confidence=0.95):
+    """Percentile confidence intervals per parameter from bootstrap estimates
+    
+    Returns (lower, upper) arrays; failed resamples (NaN rows) are ignored.
+    """
+    tail = 100 * (1 - confidence) / 2
+    with np.errstate(all='ignore'):
+        lower, upper = np.nanpercentile(estimates, [tail, 100 - tail], axis=0)
+    return lower, upper
+
+# ============================================================================
+# FIT QUALITY
+# ============================================================================
+
+class DataSummary:
+    """Everything the page needs from one dataset, computed once and shared
+    
+    Holds count, mean, std, min, max and median; the sorted sample with the
+    ECDF step heights just after and just before each point (for KS) and the
+    plotting positions (2i - 1) / 2n (for Anderson-Darling and Cramer-von
+    Mises); the fixed 'auto' density histogram used by the fit metrics; and
+    the PLOT_BINS density histogram drawn by plot_distribution. All arrays are
+    read-only so one summary can be shared by every session. `weights` is
+    None for a plain array. For WeightedData, and for summaries whose points
+    stand for several values each (see SketchSummary), `sorted` holds the
+    distinct points and `weights` the count behind each.
+    """
+    
+    weights = None
+    
+    def __init__(self, data, running=None):
+        if isinstance(data, WeightedData):
+            self._summarize_weighted(data.points, data.counts, running or data.stats())
+            return
+        
+        # Reuse moments already accumulated while streaming, if provided
+        if running is None:
+            running = RunningStats().update(data)
+        self.count = running.count
+        self.mean = running.mean
+        self.std = running.std
+        
+        self.sorted = np.sort(data)
+        n = len(self.sorted)
+        self.min, self.max = float(self.sorted[0]), float(self.sorted[-1])
+        mid = n // 2
+        self.median = float(self.sorted[mid] if n % 2 else (self.sorted[mid - 1] + self.sorted[mid]) / 2)
+        self.ecdf_upper = np.arange(1, n + 1) / n
+        self.ecdf_lower = np.arange(0, n) / n
+        self.ecdf_mid = np.arange(1, 2 * n, 2) / (2 * n)
+        
+        self.hist, self.bin_edges = np.histogram(self.sorted, bins='auto', density=True)
+        self.bin_centers = (self.bin_edges[:-1] + self.bin_edges[1:]) / 2
+        self.plot_hist, self.plot_edges = np.histogram(self.sorted, bins=PLOT_BINS, density=True)
+        
+        for arr in (self.sorted, self.ecdf_upper, self.ecdf_lower, self.ecdf_mid, self.hist,
+                    self.bin_edges, self.bin_centers, self.plot_hist, self.plot_edges):
+            arr.flags.writeable = False
+    
+    def _summarize_weighted(self, points, weights, running):
+        """Fill in the summary from sorted points each standing for weights[i] values"""
+        self.count = running.count
+        self.mean = running.mean
+        self.std = running.std
+        self.min, self.max = running.min, running.max
+        
+        self.sorted, self.weights = points, weights
+        cumulative = np.cumsum(weights)
+        n = self.count
+        middle = _values_at_ranks(points, cumulative, [(n + 1) // 2, n // 2 + 1])
+        self.median = float(middle[0] if n % 2 else np.mean(middle))
+        self.ecdf_upper = cumulative / n
+        self.ecdf_lower = (cumulative - weights) / n
+        self.ecdf_mid = (self.ecdf_lower + self.ecdf_upper) / 2
+        
+        self.hist, self.bin_edges = np.histogram(points, bins=_auto_bin_edges(points, cumulative, running),
+                                                 weights=weights, density=True)
+        self.bin_centers = (self.bin_edges[:-1] + self.bin_edges[1:]) / 2
+        self.plot_hist, self.plot_edges = np.histogram(points, bins=PLOT_BINS, range=(self.min, self.max),
+                                                       weights=weights, density=True)
+        
+        for arr in (self.sorted, self.weights, self.ecdf_upper, self.ecdf_lower, self.ecdf_mid, self.hist,
+                    self.bin_edges, self.bin_centers, self.plot_hist, self.plot_edges):
+            arr.flags.writeable = False
+
+def _values_at_ranks(points, cumulative, ranks):
+    """The values of rank r (1-based) in sorted points with cumulative weights"""
+    index = np.searchsorted(cumulative, ranks, side='left')
+    return points[np.clip(index, 0, len(points) - 1)]
+
+def _auto_bin_edges(points, cumulative, running):
+    """Bin edges like np.histogram's 'auto' rule, for weighted points
+    
+    The smaller of the Freedman-Diaconis and Sturges widths, but never more
+    bins than there are points, since finer bins would only show how the
+    values are quantized (or a sketch's own granularity).
+    """
+    low, high = running.min, running.max
+    if high <= low:
+        return np.array([low - 0.5, high + 0.5])
+    n = running.count
+    span = high - low
+    width = span / (np.log2(n) + 1.0)
+    q1, q3 = _values_at_ranks(points, cumulative, [0.25 * n, 0.75 * n])
+    fd_width = 2.0 * (q3 - q1) * n ** (-1 / 3)
+    if fd_width > 0:
+        width = min(width, fd_width)
+    bins = int(min(np.ceil(span / width), len(points)))
+    return np.linspace(low, high, max(bins, 1) + 1)
+
+def calculate_fit_quality(data, dist_obj, params, summary=None):
+    """Calculate goodness of fit metrics and information criteria
+    
+    Returns MSE and Max Error against the density histogram, the KS statistic
+    and p-value, the Anderson-Darling and Cramer-von Mises statistics, and the
+    log-likelihood with AIC and BIC. Sorting and binning come from the
+    dataset's DataSummary, so everything is derived from one pdf evaluation
+    at the bin centers plus one cdf and one logpdf evaluation of the sorted
+    sample. With a SketchSummary the same metrics are computed on the
+    sketch's weighted points.
+    """
+    if summary is None:
+        summary = DataSummary(data)
+    n, k = summary.count, len(params)
+    
+    # Get theoretical density
+    theoretical = dist_obj.pdf(summary.bin_centers, *params)
+    
+    # Calculate metrics
+    mse = np.mean((summary.hist - theoretical) ** 2)
+    max_error = np.max(np.abs(summary.hist - theoretical))
+    
+    with np.errstate(all='ignore'):
+        cdf_vals = dist_obj.cdf(summary.sorted, *params)
+        
+        # Kolmogorov-Smirnov statistic against the precomputed ECDF steps,
+        # with the same exact p-value as stats.kstest
+        ks_stat = max(np.max(summary.ecdf_upper - cdf_vals), np.max(cdf_vals - summary.ecdf_lower))
+        ks_pvalue = np.clip(stats.kstwo.sf(ks_stat, n), 0.0, 1.0)
+        
+        if summary.weights is None:
+            log_likelihood = np.sum(dist_obj.logpdf(summary.sorted, *params))
+            
+            # Anderson-Darling pairs the i-th smallest cdf value with the i-th
+            # largest; both are read off the same sorted evaluation
+            ad_stat = -n - np.sum(2 * summary.ecdf_mid * (np.log(cdf_vals) + np.log1p(-cdf_vals[::-1])))
+            cvm_stat = 1 / (12 * n) + np.sum((summary.ecdf_mid - cdf_vals) ** 2)
+        else:
+            log_likelihood = np.sum(summary.weights * dist_obj.logpdf(summary.sorted, *params))
+            
+            # Both statistics integrated exactly over the weighted ECDF's
+            # steps; with unit weights these reduce to the formulas above
+            lower, upper = summary.ecdf_lower, summary.ecdf_upper
+            ad_stat = -n + n * np.sum(np.log(cdf_vals) * (lower ** 2 - upper ** 2)
+                                      - np.log1p(-cdf_vals) * ((1 - lower) ** 2 - (1 - upper) ** 2))
+            cvm_stat = n / 3 * np.sum((upper - cdf_vals) ** 3 - (lower - cdf_vals) ** 3)
+    
+    return {
+        'MSE': mse,
+        'Max Error': max_error,
+        'KS Statistic': ks_stat,
+        'KS p-value': ks_pvalue,
+        'AD Statistic': ad_stat,
+        'CvM Statistic': cvm_stat,
+        'Log-Likelihood': log_likelihood,
+        'AIC': 2 * k - 2 * log_likelihood,
+        'BIC': k * np.log(n) - 2 * log_likelihood
+    }
+
+def rejecting_tests(metrics):
+    """Names of the goodness-of-fit tests that reject the fit at FIT_ALPHA"""
+    rejected = []
+    if not metrics['KS p-value'] > FIT_ALPHA:
+        rejected.append('KS')
+    if not metrics['AD Statistic'] < AD_CRITICAL:
+        rejected.append('Anderson-Darling')
+    if not metrics['CvM Statistic'] < CVM_CRITICAL:
+        rejected.append('Cramer-von Mises')
+    return rejected
+
+def score_fit(data, dist_name, params, summary=None):
+    """Fit quality metrics and information criteria for one fitted DISTRIBUTIONS entry"""
+    dist_obj = DISTRIBUTIONS[dist_name]['dist']
+    return {
+        'Distribution': dist_name,
+        'Parameters': dict(zip(DISTRIBUTIONS[dist_name]['params'], params)),
+        **calculate_fit_quality(data, dist_obj, params, summary)
+    }
+
+def fit_and_score(data, dist_names, **fit_options):
+    """Fit and score several distributions on one series, one after another
+    
+    Returns a list of score_fit rows; a distribution that fails gets a row
+    with just 'Distribution' and 'Error'. Used as a per-series worker job.
+    """
+    summary = DataSummary(data) if len(data) > 0 else None
+    rows = []
+    for name in dist_names:
+        try:
+            params = fit_distribution(data, DISTRIBUTIONS[name]['dist'], **fit_options)
+            rows.append(score_fit(data, name, params, summary))
+        except Exception as e:
+            rows.append({'Distribution': name, 'Error': f"{type(e).__name__}: {e}"})
+    return rows
+
+def fit_all_distributions(data, dist_names=None, executor=None, starts=None, timeout=None,
+                          **fit_options):
+    """Fit several DISTRIBUTIONS entries, concurrently if an executor is given
+    
+    Returns {name: params}, with None for fits that failed. With a process
+    pool, wall time is bounded by the slowest single fit rather than the sum.
+    `starts` ({name: params}) warm-starts the named fits. With an executor,
+    `timeout` caps the seconds spent waiting for each fit once the earlier
+    ones are collected; a fit still unfinished then is cancelled if it has
+    not started and counts as failed. A fit already running cannot be
+    stopped and keeps its worker busy until it returns.
+    """
+    if dist_names is None:
+        dist_names = list(DISTRIBUTIONS)
+    starts = starts or {}
+    
+    if executor is None:
+        futures = None
+    else:
+        futures = {name: executor.submit(fit_distribution, data, DISTRIBUTIONS[name]['dist'],
+                                         starts.get(name), **fit_options)
+                   for name in dist_names}
+    
+    results = {}
+    for name in dist_names:
+        try:
+            if futures is None:
+                results[name] = fit_distribution(data, DISTRIBUTIONS[name]['dist'], starts.get(name),
+                                                 **fit_options)
+            else:
+                results[name] = futures[name].result(timeout=timeout)
+        except Exception:
+            if futures is not None:
+                futures[name].cancel()
+            results[name] = None
+    return results
+
+def rank_fits(data, all_params, sort_by='KS Statistic', summary=None, scores=None):
+    """Leaderboard DataFrame of fitted distributions, best first
+    
+    Metrics already computed for a distribution can be passed in `scores`
+    ({name: calculate_fit_quality result}) instead of being recomputed.
+    Distributions that failed to fit or to score are listed last.
+    """
+    if summary is None:
+        summary = DataSummary(data)
+    
+    rows = []
+    for name, params in all_params.items():
+        row = {'Distribution': name, 'KS Statistic': np.nan, 'KS p-value': np.nan,
+               'AD Statistic': np.nan, 'CvM Statistic': np.nan, 'MSE': np.nan,
+               'AIC': np.nan, 'BIC': np.nan}
+        if params is not None:
+            try:
+                metrics = scores[name] if scores and name in scores else score_fit(data, name, params, summary)
+                row.update({key: metrics[key] for key in row if key != 'Distribution'})
+            except Exception:
+                pass
+        rows.append(row)
+    
+    leaderboard = pd.DataFrame(rows).replace([np.inf, -np.inf], np.nan)
+    leaderboard = leaderboard.sort_values(sort_by, na_position='last').reset_index(drop=True)
+    leaderboard.index += 1
+    return leaderboard
+
+def _race_subsample(data, size, rng):
+    """`size` points drawn without replacement, plus the data's extremes
+    
+    The extremes keep each subsample fit's support wide enough to warm-start
+    fits on larger samples. WeightedData gives WeightedData.
+    """
+    if isinstance(data, WeightedData):
+        counts = rng.multivariate_hypergeometric(data.counts, size)
+        counts[[0, -1]] = np.maximum(counts[[0, -1]], 1)
+        return WeightedData(data.values[counts > 0], counts[counts > 0])
+    sample = data[rng.choice(len(data), size=size, replace=False)]
+    return np.concatenate([sample, [np.min(data), np.max(data)]])
+
+def race_distributions(data, dist_names=None, sort_by='KS Statistic', executor=None,
+                       initial_size=RACE_INITIAL_SIZE, eta=RACE_ETA, finalists=RACE_FINALISTS,
+                       seed=0, timeout=None, **fit_options):
+    """Pick the best-fitting DISTRIBUTIONS entries by successive halving
+    
+    Every candidate is fitted exactly on a random subsample of
+    `initial_size` points and scored by calculate_fit_quality's `sort_by`
+    metric (lower is better). The best 1/eta, and at least `finalists`,
+    are refitted on a subsample eta times larger, each warm-started from
+    its previous estimate, until `finalists` remain or the next subsample
+    would be over 1/eta of the data. Only the survivors are fitted to all of
+    data, with fit_options, again warm-started. Fits run on `executor` if
+    given, with a per-fit `timeout`, as in fit_all_distributions; a fit that
+    times out in a round scores NaN and is dropped.
+    
+    Returns (results, rounds): results is {name: params} for the survivors,
+    with None where the full fit failed; rounds lists one dict per
+    subsample round with its 'size', every candidate's 'scores' and the
+    names 'kept'.
+    """
+    if dist_names is None:
+        dist_names = list(DISTRIBUTIONS)
+    rng = np.random.default_rng(seed)
+    candidates, starts, rounds = list(dist_names), {}, []
+    size = initial_size
+    
+    while len(candidates) > finalists and size * eta <= len(data):
+        sample = _race_subsample(data, size, rng)
+        params = fit_all_distributions(sample, candidates, executor, starts, timeout)
+        summary = DataSummary(sample)
+        scores = {}
+        for name in candidates:
+            try:
+                score = calculate_fit_quality(sample, DISTRIBUTIONS[name]['dist'], params[name],
+                                              summary)[sort_by]
+            except Exception:
+                score = np.nan
+            scores[name] = float(score)
+        
+        # Failed fits and undefined scores rank last
+        ranked = sorted(candidates, key=lambda name: scores[name] if np.isfinite(scores[name]) else np.inf)
+        candidates = ranked[:max(finalists, -(-len(ranked) // eta))]
+        starts = {name: params[name] for name in candidates if params[name] is not None}
+        rounds.append({'size': len(sample), 'scores': scores, 'kept': list(candidates)})
+        size *= eta
+    
+    results = fit_all_distributions(data, candidates, executor, starts, timeout, **fit_options)
+    return results, rounds
+
+# ============================================================================
+# SKETCHES
+# ============================================================================
+
+class QuantileSketch:
+    """Fixed-memory summary of a sample too large to hold: a KLL quantile sketch plus RunningStats
+    
+    Values are added chunk by chunk with update(), and sketches built over
+    separate parts of the data (e.g. by different workers) combine with
+    merge(). Memory stays under about 3 * k values however many are added;
+    count, mean, std, min and max are exact.
+    
+    Level h of the sketch holds values standing for 2**h original values
+    each. While the sketch holds more values than its levels' total capacity,
+    the lowest level over its own capacity is sorted and every other value
+    (from a random offset) moves up a level. Each such compaction shifts the
+    estimated rank of any point by 0 or +/-2**h with equal chance, so the
+    errors are zero-mean and their sum obeys Hoeffding/Azuma bounds;
+    rank_error() turns the compactions actually made into a guaranteed bound.
+    """
+    
+    def __init__(self, k=SKETCH_K, seed=None):
+        self.k = k
+        self.stats = RunningStats()
+        self.levels = [np.empty(0)]
+        self._error_sum_sq = 0.0
+        self._rng = np.random.default_rng(seed)
+        self._view = None
+    
+    @property
+    def count(self):
+        return self.stats.count
+    
+    def update(self, values):
+        """Add a chunk of values; NaNs are dropped"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.stats.update(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+    
+    def merge(self, other):
+        """Fold in another sketch; error bounds add up"""
+        self.stats.merge(other.stats)
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self._error_sum_sq += other._error_sum_sq
+        self._compress()
+        return self
+    
+    def _capacity(self, h):
+        # Capacities shrink geometrically below the top level
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - h))))
+    
+    def _compress(self):
+        # Compact lazily, lowest overfull level first, so the sketch stays
+        # close to its full capacity instead of emptying every level it touches
+        self._view = None
+        while sum(map(len, self.levels)) > sum(map(self._capacity, range(len(self.levels)))):
+            h = next(h for h, level in enumerate(self.levels) if len(level) > self._capacity(h))
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[h])
+            # An odd value out stays behind so the total weight is unchanged
+            odd = len(items) % 2
+            offset = int(self._rng.integers(2))
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], items[odd + offset::2]])
+            self.levels[h] = items[:odd]
+            self._error_sum_sq += 4.0 ** h
+    
+    def weighted_points(self):
+        """(sorted values, weight of each, cumulative weight), read-only"""
+        if self._view is None:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+            order = np.argsort(items, kind='stable')
+            self._view = (items[order], weights[order], np.cumsum(weights[order]))
+            for arr in self._view:
+                arr.flags.writeable = False
+        return self._view
+    
+    def rank(self, x):
+        """Estimated number of values <= x"""
+        items, _, cumulative = self.weighted_points()
+        index = np.searchsorted(items, x, side='right')
+        return np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0.0)
+    
+    def cdf(self, x):
+        """Estimated fraction of values <= x (the empirical CDF)"""
+        return self.rank(x) / self.count
+    
+    def quantile(self, q):
+        """A value whose true rank is within rank_error() * count of q * count"""
+        items, _, cumulative = self.weighted_points()
+        index = np.searchsorted(cumulative, np.asarray(q) * self.count, side='left')
+        return items[np.clip(index, 0, len(items) - 1)]
+    
+    def rank_error(self, delta=0.01):
+        """Bound on the empirical-CDF error, as a fraction of count
+        
+        With probability at least 1 - delta, |cdf(x) - true ECDF(x)| is at
+        most this for every x at once (a union bound over the n + 1 intervals
+        between distinct values), so quantile() ranks and the KS statistic
+        of a SketchSummary are off by no more than the same amount. Zero
+        while nothing has been compacted.
+        """
+        if self._error_sum_sq == 0:
+            return 0.0
+        n = self.count
+        return float(np.sqrt(2 * self._error_sum_sq * np.log(2 * (n + 1) / delta)) / n)
+
+class SketchSummary(DataSummary):
+    """DataSummary computed from a QuantileSketch instead of the full sample
+    
+    calculate_fit_quality and plot_distribution accept it in place of a
+    DataSummary. Count, mean, std, min and max are exact. The median, both
+    histograms and the ECDF (hence the KS, Anderson-Darling and Cramer-von
+    Mises statistics) come from the sketch's weighted points: the median's
+    rank, every ECDF value, each histogram bin's share of the data and the
+    KS statistic are within `error` of the exact values with probability
+    0.99 (see QuantileSketch.rank_error). Log-likelihood, AIC and BIC treat
+    each point as `weight` copies of itself, so are approximate too.
+    """
+    
+    def __init__(self, sketch):
+        points, weights, _ = sketch.weighted_points()
+        self._summarize_weighted(points, weights, sketch.stats)
+        self.error = sketch.rank_error()
+
+def fit_sketch(sketch, dist_obj, start=None, bins=BINNED_FIT_BINS):
+    """Binned maximum-likelihood fit to a QuantileSketch
+    
+    Bin counts are read off the sketch's ECDF, interpolated linearly between
+    its points so that mass is spread over the gaps rather than piled on the
+    points, and fitted with fit_histogram. Start values are `start` if
+    given and its support covers the sketch's range, otherwise an exact fit
+    on a weighted subsample of the points.
+    """
+    items, weights, cumulative = sketch.weighted_points()
+    edges = np.linspace(sketch.stats.min, sketch.stats.max, min(bins, len(items)) + 1)
+    ecdf = np.interp(edges, items, cumulative - weights / 2, left=0, right=sketch.count)
+    ecdf[0], ecdf[-1] = 0, sketch.count
+    counts = np.diff(ecdf)
+    if start is None or not _covers(dist_obj, start, edges[0], edges[-1]):
+        rng = np.random.default_rng(0)
+        sample = rng.choice(items, size=min(sketch.count, BINNED_FIT_SUBSAMPLE), p=weights / weights.sum())
+        start = _fit_exact(np.concatenate([sample, [edges[0], edges[-1]]]), dist_obj)
+    return tuple(float(p) for p in fit_histogram(counts, edges, dist_obj, start))
+
+def fit_and_score_sketch(sketch, dist_names):
+    """fit_and_score for a QuantileSketch: fit_sketch, then score on its SketchSummary"""
+    summary = SketchSummary(sketch)
+    rows = []
+    for name in dist_names:
+        try:
+            params = fit_sketch(sketch, DISTRIBUTIONS[name]['dist'])
+            rows.append(score_fit(None, name, params, summary))
+        except Exception as e:
+            rows.append({'Distribution': name, 'Error': f"{type(e).__name__}: {e}"})
+    return rows
+
+def _column_chunks(source, kind, columns, chunksize):
+    """Yield {column: float64 values} chunk by chunk from a CSV or binary data file"""
+    if kind == 'csv':
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        for chunk in pd.read_csv(source, usecols=list(columns), chunksize=chunksize):
+            yield {column: chunk[column].to_numpy(dtype=np.float64) for column in columns}
+    elif kind == 'npy':
+        array = _open_npy(source)
+        for start in range(0, len(array), chunksize):
+            block = array[start:start + chunksize]
+            yield {column: np.asarray(_npy_column(block, column), dtype=np.float64) for column in columns}
+    elif kind == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(_arrow_table_source(source)).iter_batches(chunksize, columns=list(columns)):
+            yield {column: batch.column(column).to_numpy(zero_copy_only=False).astype(np.float64)
+                   for column in columns}
+    elif kind == 'arrow':
+        table = _open_arrow_ipc(source).select(list(columns))
+        for batch in table.to_batches(chunksize):
+            yield {column: batch.column(column).to_numpy(zero_copy_only=False).astype(np.float64)
+                   for column in columns}
+    else:
+        raise ValueError(f"Unknown data format: {kind!r}")
+
+def sketch_columns(source, kind, columns, k=SKETCH_K, chunksize=CSV_CHUNK_SIZE):
+    """Build a QuantileSketch per column in one chunked pass over a file
+    
+    kind is 'csv' or a binary_format() kind. At most `chunksize` rows are in
+    memory at a time and nothing else is kept, so files larger than RAM can
+    be summarized. Returns {column: QuantileSketch}.
+    """
+    sketches = {column: QuantileSketch(k, seed=i) for i, column in enumerate(columns)}
+    for chunk in _column_chunks(source, kind, columns, chunksize):
+        for column, values in chunk.items():
+            sketches[column].update(values)
+    return sketches
+
+# ============================================================================
+# PLOTTING
+# ============================================================================
+
+def draw_data_layer(ax, summary):
+    """Draw everything that depends only on the data; return the (empty) fit line"""
+    # Set figure background
+    ax.set_facecolor('#ffffff')
+    
+    # Create x range for fitted distribution (like example: x = np.linspace(0, 25, 100))
+    x_min = max(0, summary.min - 1)
+    x_max = summary.max + 1
+    x = np.linspace(x_min, x_max, 100)
+    
+    # Plot fitted distribution line first (like example: ax.plot(x, fit));
+    # its values are filled in by update_fit_line
+    line, = ax.plot(x, np.zeros_like(x), color='#e94560', linewidth=2.5)
+    
+    # Plot histogram second (like example: ax.hist(data, bins=25, density=True)),
+    # drawn from the precomputed bin heights instead of rebinning the data
+    ax.hist(summary.plot_edges[:-1], bins=summary.plot_edges, weights=summary.plot_hist,
+            alpha=0.7, color='#5eaaa8', edgecolor='#2c5282', label='Data')
+    
+    ax.set_xlabel('Value', fontsize=12, fontfamily='sans-serif', color='#000000', labelpad=10)
+    ax.set_ylabel('Density', fontsize=12, fontfamily='sans-serif', color='#000000', labelpad=10)
+    ax.grid(True, alpha=0.3, linestyle='--', color='#95a5a6')
+    ax.tick_params(colors='#000000', labelsize=10, pad=5)
+    
+    # Set spine colors - neutral gray
+    for spine in ax.spines.values():
+        spine.set_edgecolor('#bdc3c7')
+        spine.set_linewidth(1)
+    return line
+
+def update_fit_line(ax, line, dist_obj, params, dist_name):
+    """Redraw only the fitted PDF, title and legend for new parameters"""
+    # Get fitted distribution PDF (like example: fit = dist.pdf(x))
+    line.set_ydata(dist_obj(*params).pdf(line.get_xdata()))
+    line.set_label(f'Fitted {dist_name}')
+    
+    ax.set_title(f'Data Distribution with Fitted {dist_name}', fontsize=14, fontweight='400', 
+                 fontfamily='sans-serif', color='#2c3e50', pad=15)
+    ax.legend(fontsize=11, framealpha=0.95, facecolor='#f8f9fa', edgecolor='#bdc3c7', 
+              labelcolor='#2c3e50', loc='best')
+    ax.relim()
+    ax.autoscale_view()
+
+def plot_distribution(data, dist_obj, params, dist_name, ax, summary=None):
+    """Plot histogram and fitted distribution visualization - matches example code structure"""
+    if summary is None:
+        summary = DataSummary(data)
+    line = draw_data_layer(ax, summary)
+    update_fit_line(ax, line, dist_obj, params, dist_name)
+
+# ============================================================================
+# WARM-UP
+# ============================================================================
+
+# Size of the synthetic sample every fit path is exercised on
+WARM_UP_SAMPLE = 200
+
+def warm_up(dist_names=None, plot=True):
+    """Import scipy, pandas and matplotlib and run every fit and scoring path once
+    
+    Meant to run at server start (see serve.py) so the first session does not
+    pay for the imports and for scipy's first-call initialization of each
+    distribution. Returns the seconds it took.
+    """
+    start = time.perf_counter()
+    sample = np.random.default_rng(0).gamma(3.0, 2.0, size=WARM_UP_SAMPLE) + 1.0
+    summary = DataSummary(sample)
+    importlib.import_module('pandas')
+    
+    for name in dist_names if dist_names is not None else DISTRIBUTIONS:
+        dist_obj = DISTRIBUTIONS[name]['dist']
+        try:
+            params = fit_distribution(sample, dist_obj)
+            calculate_fit_quality(sample, dist_obj, params, summary)
+        except Exception:
+            # A distribution that cannot fit this sample is still warmed up
+            continue
+    
+    if plot:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(10, 7))
+        plot_distribution(sample, DISTRIBUTIONS['Gamma']['dist'], (3.0, 1.0, 2.0), 'Gamma',
+                          fig.subplots(), summary)
+        fig.savefig(io.BytesIO(), format='png')
+    return time.perf_counter() - start
@@ -0,0 +1,185 @@
+"""Headless multi-session load test of the Streamlit app
+
+Runs N simulated sessions of streamlit_app.py at once, each in its own thread
+of this process as the Streamlit server would, so process-wide caches and
+shared datasets behave as in production. Every session loads the page,
+uploads the same CSV, switches the fitted distribution a few times and drags
+a manual-fit slider. Reports latency percentiles per interaction, overall
+throughput, and memory retained per live session. Memory is measured in a
+separate run under tracemalloc, so tracing does not slow the timed run:
+
+    python loadtest.py --sessions 1 4 16 -o load.json
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'streamlit_app.py')
+
+# Session state key the patched file_uploader returns the session's upload from
+UPLOAD_STATE_KEY = '_loadtest_upload'
+
+# Distributions each session switches through, and slider positions it drags to
+SWITCH_DISTRIBUTIONS = ['Gamma', 'Lognormal', 'Weibull', 'Normal']
+SLIDER_STEPS = 5
+
+# Seconds a single interaction may take before it counts as failed
+INTERACTION_TIMEOUT = 120
+
+class UploadedCSV(io.BytesIO):
+    """Stands in for Streamlit's UploadedFile: a BytesIO with name and file_id"""
+    
+    def __init__(self, content, name, file_id):
+        super().__init__(content)
+        self.name = name
+        self.file_id = file_id
+
+def _patched_file_uploader(*args, **kwargs):
+    # AppTest cannot drive a file upload, so each session's upload is placed
+    # in its session state and returned from here
+    return st.session_state.get(UPLOAD_STATE_KEY)
+
+def make_csv(rows, seed=0):
+    """CSV bytes with a Gamma and a Normal column, the same for every session"""
+    rng = np.random.default_rng(seed)
+    lines = ['gamma,normal'] + [f"{g!r},{n!r}" for g, n in
+                                zip(rng.gamma(3.0, 2.0, rows).tolist(), rng.normal(5.0, 1.0, rows).tolist())]
+    return '\n'.join(lines).encode()
+
+def run_session(index, csv, record):
+    """One user's visit; record(interaction, seconds, ok) is called per step. Returns the AppTest"""
+    at = AppTest.from_file(APP, default_timeout=INTERACTION_TIMEOUT)
+    
+    def step(name, action):
+        start = time.perf_counter()
+        try:
+            action().run()
+            ok = not at.exception
+        except Exception:
+            ok = False
+        record(name, time.perf_counter() - start, ok)
+    
+    step('load', lambda: at)
+    
+    def upload():
+        at.session_state[UPLOAD_STATE_KEY] = UploadedCSV(csv, 'loadtest.csv', f'loadtest-{index}')
+        return at.radio[0].set_value("File Upload")
+    step('upload', upload)
+    
+    for name in SWITCH_DISTRIBUTIONS:
+        step('switch distribution', lambda: at.selectbox(key='auto_dist').set_value(name))
+    
+    slider = at.slider[0]
+    for value in np.linspace(slider.min, slider.max, SLIDER_STEPS + 2)[1:-1]:
+        step('drag slider', lambda: at.slider[0].set_value(float(value)))
+    return at
+
+def _run_sessions(sessions, csv, record):
+    """Run `sessions` concurrent sessions to completion; return their AppTests, still alive"""
+    finished = [None] * sessions
+    
+    def worker(index):
+        finished[index] = run_session(index, csv, record)
+    
+    threads = [threading.Thread(target=worker, args=(i,), name=f'session-{i}') for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return finished
+
+def run_load(sessions, csv):
+    """Run `sessions` concurrent sessions; return (latencies, failures, seconds)"""
+    latencies, failures = {}, {}
+    lock = threading.Lock()
+    
+    def record(name, seconds, ok):
+        with lock:
+            latencies.setdefault(name, []).append(seconds)
+            if not ok:
+                failures[name] = failures.get(name, 0) + 1
+    
+    start = time.perf_counter()
+    _run_sessions(sessions, csv, record)
+    return latencies, failures, time.perf_counter() - start
+
+def memory_per_session(sessions, csv):
+    """Bytes allocated during a run of `sessions` sessions and still held, per session
+    
+    Allocations are traced from just before the sessions start until all of
+    them have finished but are still alive, as in a server holding open
+    tabs. Caches filled earlier (e.g. by the warm-up) are not counted; those
+    filled by this run are, spread over its sessions.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        held = _run_sessions(sessions, csv, lambda name, seconds, ok: None)
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del held
+    return retained / sessions
+
+def summarize(sessions, latencies, failures, elapsed, per_session, percentiles=(50, 90, 99)):
+    interactions = sum(len(values) for values in latencies.values())
+    return {
+        'sessions': sessions,
+        'seconds': elapsed,
+        'interactions': interactions,
+        'throughput': interactions / elapsed,
+        'memory_per_session': per_session,
+        'latency': {
+            name: {'count': len(values), 'failed': failures.get(name, 0),
+                   **{f'p{p}': float(np.percentile(values, p)) for p in percentiles}}
+            for name, values in latencies.items()
+        }
+    }
+
+def print_report(report):
+    print(f"\n{report['sessions']} sessions: {report['interactions']} interactions in {report['seconds']:.1f}s "
+          f"({report['throughput']:.2f}/s), {report['memory_per_session'] / 2 ** 20:.1f} MiB per session")
+    print(f"{'interaction':<24}{'count':>8}{'failed':>8}{'p50 ms':>12}{'p90 ms':>12}{'p99 ms':>12}")
+    for name, row in report['latency'].items():
+        print(f"{name:<24}{row['count']:>8}{row['failed']:>8}"
+              f"{row['p50'] * 1000:>12.1f}{row['p90'] * 1000:>12.1f}{row['p99'] * 1000:>12.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the app with concurrent simulated sessions.")
+    parser.add_argument('--sessions', nargs='+', type=int, default=[1, 4, 16],
+                        help="concurrent session counts to run, one after another (default: 1 4 16)")
+    parser.add_argument('--rows', type=int, default=10_000, help="rows in the uploaded CSV (default: 10000)")
+    parser.add_argument('--no-warm-up', action='store_true',
+                        help="start cold instead of running one session first to fill the caches")
+    parser.add_argument('-o', '--output', help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+    
+    st.file_uploader = _patched_file_uploader
+    csv = make_csv(args.rows)
+    if not args.no_warm_up:
+        run_load(1, csv)
+    
+    reports = []
+    for sessions in args.sessions:
+        report = summarize(sessions, *run_load(sessions, csv), memory_per_session(sessions, csv))
+        print_report(report)
+        reports.append(report)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Fitted parameters and fit quality metrics persisted in SQLite
+
+One row per (data content hash, distribution, fit method, versions),
+holding the fitted parameters and, once computed, their calculate_fit_quality
+metrics. Every session and every server process on the machine can share one
+store file, so a dataset fitted once is a lookup for everyone afterwards,
+including after restarts. Rows from another fitting_engine.ENGINE_VERSION
+or other numpy/scipy versions never match and age out. When the stored rows outgrow max_bytes, the least recently used
+are evicted. Nothing here depends on Streamlit.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from importlib.metadata import version
+
+from fitting_engine import ENGINE_VERSION
+
+logger = logging.getLogger('histograms.store')
+
+# Default size budget for stored rows
+RESULT_STORE_MAX_BYTES = 64 * 2 ** 20
+
+# Seconds to wait for another process holding the database lock
+LOCK_TIMEOUT = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fits (
+    data_hash TEXT NOT NULL,
+    distribution TEXT NOT NULL,
+    method TEXT NOT NULL,
+    versions TEXT NOT NULL,
+    params TEXT NOT NULL,
+    metrics TEXT,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (data_hash, distribution, method, versions)
+)
+"""
+
+def library_versions():
+    """Engine, numpy and scipy versions, read from package metadata without importing scipy"""
+    return f"engine={ENGINE_VERSION};numpy={version('numpy')};scipy={version('scipy')}"
+
+def fit_method(fit_options):
+    """Stable text form of fit_distribution options, e.g. 'exact' or 'method=binned'"""
+    if not fit_options:
+        return 'exact'
+    return ','.join(f"{key}={value}" for key, value in sorted(fit_options.items()))
+
+def _row_size(*fields):
+    return sum(len(field) for field in fields if field is not None)
+
+class ResultStore:
+    """Thread-safe persistent map of (data hash, distribution, method) -> params and metrics
+    
+    A failing database (locked too long, disk full, corrupt) is logged and
+    treated as a miss, so fitting carries on without the store.
+    """
+    
+    def __init__(self, path, max_bytes=RESULT_STORE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.versions = library_versions()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=LOCK_TIMEOUT, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(SCHEMA)
+    
+    def get(self, data_hash, distribution, method):
+        """Return {'params': tuple, 'metrics': dict or None}, or None if not stored"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    'SELECT params, metrics FROM fits '
+                    'WHERE data_hash = ? AND distribution = ? AND method = ? AND versions = ?',
+                    (data_hash, distribution, method, self.versions)).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute(
+                    'UPDATE fits SET last_used = ? '
+                    'WHERE data_hash = ? AND distribution = ? AND method = ? AND versions = ?',
+                    (time.time(), data_hash, distribution, method, self.versions))
+        except sqlite3.Error as e:
+            logger.warning("Result store lookup failed: %s", e)
+            return None
+        params, metrics = row
+        return {'params': tuple(json.loads(params)),
+                'metrics': json.loads(metrics) if metrics is not None else None}
+    
+    def put(self, data_hash, distribution, method, params, metrics=None):
+        """Store fitted params, and their metrics if given, then evict down to max_bytes
+        
+        Storing params again without metrics keeps metrics already stored
+        for the same params.
+        """
+        params_text = json.dumps([float(p) for p in params])
+        metrics_text = (json.dumps({name: float(value) for name, value in metrics.items()})
+                        if metrics is not None else None)
+        size = _row_size(data_hash, distribution, method, self.versions, params_text, metrics_text)
+        try:
+            with self._lock:
+                self._conn.execute(
+                    'INSERT INTO fits VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (data_hash, distribution, method, versions) DO UPDATE SET '
+                    'metrics = CASE WHEN excluded.metrics IS NULL AND params = excluded.params '
+                    'THEN metrics ELSE excluded.metrics END, '
+                    'size = excluded.size + CASE WHEN excluded.metrics IS NULL AND params = excluded.params '
+                    'THEN COALESCE(LENGTH(metrics), 0) ELSE 0 END, '
+                    'params = excluded.params, last_used = excluded.last_used',
+                    (data_hash, distribution, method, self.versions, params_text, metrics_text,
+                     size, time.time()))
+                self._evict()
+        except sqlite3.Error as e:
+            logger.warning("Result store write failed: %s", e)
+    
+    def _evict(self):
+        # Keep the most recently used rows that fit in max_bytes
+        total, = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM fits').fetchone()
+        if total <= self.max_bytes:
+            return
+        self._conn.execute(
+            'DELETE FROM fits WHERE rowid IN ('
+            'SELECT rowid FROM (SELECT rowid, SUM(size) OVER (ORDER BY last_used DESC) AS kept FROM fits) '
+            'WHERE kept > ?)', (self.max_bytes,))
+    
+    def size_bytes(self):
+        """Total size of the stored rows, as counted against max_bytes"""
+        with self._lock:
+            return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM fits').fetchone()[0]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,29 @@
+"""Start the Streamlit app with the fitting engine warmed up in the background
+
+Imports scipy, pandas and matplotlib and runs every fit path once while the
+server boots, so the first visitor does not pay for them. Any arguments are
+passed on to `streamlit run`:
+
+    python serve.py --server.port 8501
+"""
+import os
+import sys
+import threading
+
+import fitting_engine as engine
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'streamlit_app.py')
+
+def warm_up():
+    seconds = engine.warm_up()
+    print(f"Fitting engine warmed up in {seconds:.1f}s", file=sys.stderr)
+
+def main(argv=None):
+    threading.Thread(target=warm_up, name='engine-warm-up', daemon=True).start()
+    
+    from streamlit.web import cli
+    sys.argv = ['streamlit', 'run', APP, *(argv if argv is not None else sys.argv[1:])]
+    return cli.main()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,28 @@
+import time
+
+# Read before the other imports so first paint includes them
+script_started = time.perf_counter()
+
+import os
+import uuid
+import cProfile
 import streamlit as st
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from scipy import stats
 from io import StringIO
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitting_engine as engine
+from fitting_engine import (
+    DISTRIBUTIONS, BINNED_FIT_BINS, BINNED_FIT_MIN_POINTS, BINARY_FORMATS,
+    DataParseError, DataSummary,
+    binary_format, data_fingerprint, calculate_fit_quality, draw_data_layer, update_fit_line
+)
+from diagnostics import RerunTimer, stage, cache_miss, configure_timing_log, profile_run
+from fit_jobs import FIT_TIMEOUT, FitJobQueue, FitResultCache
+from result_store import ResultStore, fit_method
+
+# pandas loads on first use, so the title paints before it (and scipy) import
+pd = engine.lazy_import('pandas')
 
 # ============================================================================
 # CONFIGURATION SECTION
@@ -16,6 +35,10 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Time every stage of this rerun for the Diagnostics panel and the timing log
+session_id = st.session_state.setdefault('session_id', uuid.uuid4().hex[:12])
+rerun_timer = RerunTimer('page', session_id).start(script_started)
+
 # Custom CSS for aesthetic styling with ergonomic color scheme
 st.markdown("""
     <style>
@@ -271,381 +294,1054 @@ st.markdown("""
 # Title and description
 st.markdown('<div style="text-align: center; color: #ffffff; font-family: \'Roboto\', sans-serif; font-weight: 300; font-size: 2.8rem; letter-spacing: 2px; margin-bottom: 0.5rem; text-transform: uppercase; border-bottom: 3px solid #e94560; padding-bottom: 1.5rem;">STATISTICAL DISTRIBUTION FITTING TOOL</div>', unsafe_allow_html=True)
 st.markdown('<p class="subtitle">Prisca Chien || 21178781 || 2 Dec 2025 || NE 111</p>', unsafe_allow_html=True)
+rerun_timer.mark('first paint')
 
 # ============================================================================
-# DISTRIBUTION DEFINITIONS (10+ Types Required)
+# HELPER FUNCTIONS
 # ============================================================================
+# Parsing, fitting, scoring and plotting live in fitting_engine; the helpers
+# below add Streamlit caching and page-specific rendering on top of it.
 
-DISTRIBUTIONS = {
-    'Normal': {'dist': stats.norm, 'params': ['loc', 'scale']},
-    'Gamma': {'dist': stats.gamma, 'params': ['a', 'loc', 'scale']},
-    'Weibull': {'dist': stats.weibull_min, 'params': ['c', 'loc', 'scale']},
-    'Exponential': {'dist': stats.expon, 'params': ['loc', 'scale']},
-    'Lognormal': {'dist': stats.lognorm, 'params': ['s', 'loc', 'scale']},
-    'Beta': {'dist': stats.beta, 'params': ['a', 'b', 'loc', 'scale']},
-    'Chi-Square': {'dist': stats.chi2, 'params': ['df', 'loc', 'scale']},
-    'Uniform': {'dist': stats.uniform, 'params': ['loc', 'scale']},
-    'Logistic': {'dist': stats.logistic, 'params': ['loc', 'scale']},
-    'Pareto': {'dist': stats.pareto, 'params': ['b', 'loc', 'scale']},
-    'Rayleigh': {'dist': stats.rayleigh, 'params': ['loc', 'scale']},
-    'Student-t': {'dist': stats.t, 'params': ['df', 'loc', 'scale']}
-}
+# Maximum number of fitted parameter sets kept in the shared fit cache
+FIT_CACHE_SIZE = 128
 
-# ============================================================================
-# HELPER FUNCTIONS
-# ============================================================================
+# SQLite file where fitted parameters and fit quality persist across sessions
+# and restarts (set HISTOGRAMS_RESULT_STORE to an empty string to disable),
+# and its size budget
+RESULT_STORE_PATH = os.environ.get('HISTOGRAMS_RESULT_STORE', 'fit_results.sqlite')
+RESULT_STORE_MAX_MB = 64
 
-def parse_data(data_input):
-    """Parse comma or space-separated data"""
-    try:
-        # Replace commas with spaces and split
-        data_str = data_input.replace(',', ' ')
-        values = [float(x) for x in data_str.split() if x.strip()]
-        return np.array(values)
-    except:
-        return None
+# Maximum number of distinct input strings whose parsed arrays are memoized
+PARSE_CACHE_SIZE = 16
 
-def fit_distribution(data, dist_obj):
-    """Fit distribution to data and return parameters using scipy.stats"""
-    try:
-        params = dist_obj.fit(data)
-        return params
-    except:
+# Number of per-dataset summaries (sorted sample, ECDF, histograms) kept in memory
+DATA_SUMMARY_CACHE_SIZE = 8
+
+# Number of successive-halving selections (per dataset and ranking metric) kept,
+# and the result store method their finalists' metrics are kept under (their
+# warm-started params may differ slightly from a plain exact fit's)
+RACE_CACHE_SIZE = 8
+RACE_STORE_METHOD = 'race'
+
+# Per-rerun timing records go to this file as JSON lines ('-' for stderr)
+TIMING_LOG = os.environ.get('HISTOGRAMS_TIMING_LOG')
+
+# Where per-session cProfile dumps (<session id>.prof) are written
+PROFILE_DIR = os.environ.get('HISTOGRAMS_PROFILE_DIR', 'profiles')
+
+@st.cache_resource(show_spinner=False)
+def setup_timing_log(target):
+    """Attach the timing log handler once per server process"""
+    configure_timing_log(target)
+
+if TIMING_LOG:
+    setup_timing_log(TIMING_LOG)
+
+# Parsed and loaded arrays are cached as resources, not data: every session
+# gets the same read-only array instead of its own unpickled copy, and
+# share_dataset also merges identical contents arriving under different keys
+# (e.g. the same file uploaded by several users). With compact=True only the
+# WeightedData form (float32 where exact) is cached, never the raw array.
+
+def _share_columns(loaded):
+    return {column: (engine.share_dataset(values), running) for column, (values, running) in loaded.items()}
+
+@st.cache_resource(max_entries=PARSE_CACHE_SIZE, show_spinner=False)
+def parse_data(data_input, compact=False):
+    """engine.parse_data, memoized on the input string"""
+    cache_miss()
+    data = engine.parse_data(data_input)
+    if compact:
+        return engine.compact_data(data, downcast=True)
+    return engine.share_dataset(data)
+
+@st.cache_resource(max_entries=PARSE_CACHE_SIZE, show_spinner=False)
+def load_csv_column(file_id, column, compact, _file):
+    """engine.read_csv_column, cached per uploaded file and column
+    
+    Compacted columns are merged chunk by chunk, so the full column is never
+    held in memory.
+    """
+    cache_miss()
+    values, running = engine.read_csv_column(_file, column, compact=compact, downcast=True)
+    return (values if compact else engine.share_dataset(values)), running
+
+@st.cache_resource(max_entries=PARSE_CACHE_SIZE, show_spinner=False)
+def load_csv_columns(file_id, columns, _file):
+    """engine.read_csv_columns, cached per uploaded file and column set"""
+    cache_miss()
+    return _share_columns(engine.read_csv_columns(_file, list(columns)))
+
+@st.cache_data(max_entries=PARSE_CACHE_SIZE, show_spinner=False)
+def list_binary_columns(file_id, kind, _file):
+    """engine.binary_columns, cached per uploaded file"""
+    return engine.binary_columns(_file, kind)
+
+@st.cache_resource(max_entries=PARSE_CACHE_SIZE, show_spinner=False)
+def load_binary_columns(file_id, kind, columns, compact, _file):
+    """engine.read_binary_columns, cached per uploaded file and column set"""
+    cache_miss()
+    loaded = engine.read_binary_columns(_file, kind, list(columns))
+    if compact:
+        return {column: (engine.compact_data(values, downcast=True), running)
+                for column, (values, running) in loaded.items()}
+    return _share_columns(loaded)
+
+def load_columns(uploaded_file, columns):
+    """Read columns of an uploaded CSV or binary file as {column: (values, RunningStats)}"""
+    kind = binary_format(uploaded_file.name)
+    if kind is None:
+        return load_csv_columns(uploaded_file.file_id, tuple(columns), uploaded_file)
+    return load_binary_columns(uploaded_file.file_id, kind, tuple(columns), False, uploaded_file)
+
+@st.cache_resource(show_spinner=False)
+def get_fit_cache():
+    """Fitted parameters shared by every session (LRU, FIT_CACHE_SIZE entries)"""
+    return FitResultCache(FIT_CACHE_SIZE)
+
+@st.cache_resource(show_spinner=False)
+def get_result_store():
+    """The persistent result store shared by every session, or None if disabled"""
+    if not RESULT_STORE_PATH:
         return None
+    return ResultStore(RESULT_STORE_PATH, RESULT_STORE_MAX_MB * 2 ** 20)
 
-def calculate_fit_quality(data, dist_obj, params):
-    """Calculate goodness of fit metrics: MSE, Max Error, KS test"""
-    # Create histogram
-    hist, bin_edges = np.histogram(data, bins='auto', density=True)
-    bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
+def get_fit_queue():
+    """This session's background fit jobs"""
+    if 'fit_queue' not in st.session_state:
+        st.session_state['fit_queue'] = FitJobQueue()
+    return st.session_state['fit_queue']
+
+def run_fits(data, dist_names, fit_options, group, on_result=None):
+    """Fit DISTRIBUTIONS entries as background jobs, reusing any cached results
+    
+    Returns {name: (params, error)} where exactly one of the two is None.
+    Results are cached by data content, distribution and fit options, so
+    reruns, tabs and sessions share them, and are looked up in the persistent
+    result store before any fit is started. Jobs tagged with `group` that are no
+    longer wanted (e.g. the previous selection) are cancelled first. While
+    waiting, a status line shows each running fit's elapsed time, and
+    on_result(results) is called whenever a fit finishes. A widget change
+    interrupts the wait; the next rerun picks the job up again or cancels it.
+    """
+    cache, store, queue = get_fit_cache(), get_result_store(), get_fit_queue()
+    data_key = data_fingerprint(data)
+    options_key = tuple(sorted(fit_options.items()))
+    method = fit_method(fit_options)
+    keys = {name: (data_key, DISTRIBUTIONS[name]['dist'].name, options_key) for name in dist_names}
+    queue.retain(keys.values(), group)
     
-    # Get theoretical density
-    theoretical = dist_obj.pdf(bin_centers, *params)
+    results = {}
+    for name, key in keys.items():
+        params = cache.get(key)
+        if params is None and store is not None:
+            stored = store.get(data_key, key[1], method)
+            if stored is not None:
+                params = stored['params']
+                cache.put(key, params)
+        if params is not None:
+            results[name] = (params, None)
+        else:
+            queue.submit(key, data, DISTRIBUTIONS[name]['dist'], fit_options, group)
     
-    # Calculate metrics
-    mse = np.mean((hist - theoretical) ** 2)
-    max_error = np.max(np.abs(hist - theoretical))
+    def collect(job):
+        name = next(name for name, key in keys.items() if key == job.key)
+        if job.status == 'done':
+            cache.put(job.key, job.params)
+            if store is not None:
+                store.put(data_key, job.dist_name, method, job.params)
+            results[name] = (job.params, None)
+        else:
+            results[name] = (None, job.error)
     
-    # Calculate Kolmogorov-Smirnov statistic
-    ks_stat, ks_pvalue = stats.kstest(data, lambda x: dist_obj.cdf(x, *params))
+    pending = [key for name, key in keys.items() if name not in results]
+    if pending:
+        cache_miss()
+        status = st.empty()
+        
+        def on_update(jobs, just_finished):
+            for job in just_finished:
+                if job.key in pending:
+                    collect(job)
+            running = [job for job in jobs if job.status == 'running']
+            if running:
+                status.caption("Fitting " + ", ".join(f"{job.dist_name} ({job.elapsed:.1f}s)" for job in running)
+                               + f" · timeout {queue.timeout:g}s")
+            if on_result is not None and any(job.key in pending for job in just_finished):
+                on_result(results)
+        
+        for job in queue.wait(pending, on_update, interval=0.1):
+            collect(job)
+        status.empty()
+    return {name: results[name] for name in dist_names}
+
+def fit_distribution(data, dist_name, group, **fit_options):
+    """Fit one DISTRIBUTIONS entry as a background job; return (params, error)"""
+    return run_fits(data, [dist_name], fit_options, group)[dist_name]
+
+def get_fit_quality(data, dist_name, params, fit_options, summary, method=None):
+    """calculate_fit_quality for params fitted by run_fits, kept in the result store
     
+    Results are stored under `method`, by default fit_method(fit_options).
+    A stored row holding other params is never overwritten: those are what
+    run_fits will load for this method.
+    """
+    store = get_result_store()
+    if store is None:
+        cache_miss()
+        return calculate_fit_quality(data, DISTRIBUTIONS[dist_name]['dist'], params, summary)
+    
+    data_key, dist = data_fingerprint(data), DISTRIBUTIONS[dist_name]['dist']
+    method = method or fit_method(fit_options)
+    stored = store.get(data_key, dist.name, method)
+    same_params = stored is not None and np.allclose(stored['params'], params)
+    if same_params and stored['metrics'] is not None:
+        return stored['metrics']
+    cache_miss()
+    metrics = calculate_fit_quality(data, dist, params, summary)
+    if stored is None or same_params:
+        store.put(data_key, dist.name, method, params, metrics)
+    return metrics
+
+@st.cache_resource(max_entries=DATA_SUMMARY_CACHE_SIZE, show_spinner=False)
+def _cached_data_summary(data_key, _data, _running):
+    cache_miss()
+    return DataSummary(_data, _running)
+
+def get_data_summary(data, running=None):
+    """Return the shared DataSummary for a dataset, building it on first use"""
+    return _cached_data_summary(data_fingerprint(data), data, running)
+
+def get_plot_figure(key, summary):
+    """Session-persistent figure whose data layer is drawn once per dataset
+    
+    Returns (fig, ax, line). The figure is rebuilt only when the dataset
+    changes; otherwise callers just call update_fit_line on it.
+    """
+    cached = st.session_state.get(key)
+    if cached is None or cached['summary'] is not summary:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(10, 7))
+        ax = fig.subplots()
+        cached = {'summary': summary, 'fig': fig, 'ax': ax, 'line': draw_data_layer(ax, summary)}
+        st.session_state[key] = cached
+    return cached['fig'], cached['ax'], cached['line']
+
+def interactive_chart_spec(summary, dist_obj, params, dist_name):
+    """Vega-Lite spec drawing the precomputed histogram and fitted PDF in the browser"""
+    return histogram_chart_spec(summary.plot_edges, summary.plot_hist, (max(0, summary.min - 1), summary.max + 1),
+                                dist_obj, params, dist_name)
+
+def histogram_chart_spec(edges, density, x_range, dist_obj, params, dist_name):
+    """Vega-Lite spec of density histogram bars with the fitted PDF over x_range"""
+    x = np.linspace(*x_range, 100)
+    with np.errstate(all='ignore'):
+        fit = dist_obj.pdf(x, *params)
+    bars = [{'left': float(l), 'right': float(r), 'density': float(h)}
+            for l, r, h in zip(edges[:-1], edges[1:], density)]
+    curve = [{'x': float(u), 'pdf': float(v)} for u, v in zip(x, fit) if np.isfinite(v)]
     return {
-        'MSE': mse,
-        'Max Error': max_error,
-        'KS Statistic': ks_stat,
-        'KS p-value': ks_pvalue
+        'title': f'Data Distribution with Fitted {dist_name}',
+        'height': 450,
+        'layer': [
+            {
+                'data': {'values': bars},
+                'mark': {'type': 'rect', 'color': '#5eaaa8', 'opacity': 0.7, 'stroke': '#2c5282'},
+                'encoding': {
+                    'x': {'field': 'left', 'type': 'quantitative', 'title': 'Value'},
+                    'x2': {'field': 'right'},
+                    'y': {'field': 'density', 'type': 'quantitative', 'title': 'Density'}
+                }
+            },
+            {
+                'data': {'values': curve},
+                'mark': {'type': 'line', 'color': '#e94560', 'strokeWidth': 2.5},
+                'encoding': {
+                    'x': {'field': 'x', 'type': 'quantitative'},
+                    'y': {'field': 'pdf', 'type': 'quantitative'}
+                }
+            }
+        ]
     }
 
-def plot_distribution(data, dist_obj, params, dist_name, ax):
-    """Plot histogram and fitted distribution visualization - matches example code structure"""
-    # Set figure background
-    ax.set_facecolor('#ffffff')
+def show_fit_quality(quality_metrics):
+    """Two columns of fit quality metrics and information criteria"""
+    metric_col1, metric_col2 = st.columns(2)
+    with metric_col1:
+        st.metric("MSE", f"{quality_metrics['MSE']:.5f}", label_visibility="visible")
+        st.metric("KS Stat", f"{quality_metrics['KS Statistic']:.5f}", label_visibility="visible")
+        st.metric("AD Stat", f"{quality_metrics['AD Statistic']:.4f}", label_visibility="visible",
+                  help="Anderson-Darling: KS-like, but weighted towards the tails")
+        st.metric("AIC", f"{quality_metrics['AIC']:.2f}", label_visibility="visible",
+                  help=f"Log-likelihood {quality_metrics['Log-Likelihood']:.2f}")
+    with metric_col2:
+        st.metric("Max Err", f"{quality_metrics['Max Error']:.5f}", label_visibility="visible")
+        st.metric("p-value", f"{quality_metrics['KS p-value']:.5f}", label_visibility="visible")
+        st.metric("CvM Stat", f"{quality_metrics['CvM Statistic']:.4f}", label_visibility="visible",
+                  help="Cramer-von Mises: squared distance between fitted and empirical CDF")
+        st.metric("BIC", f"{quality_metrics['BIC']:.2f}", label_visibility="visible")
+
+def show_distribution_plot(key, dist_obj, params, dist_name, summary, interactive):
+    """Render the fit either client-side or on the session's persistent figure"""
+    if interactive:
+        st.vega_lite_chart(spec=interactive_chart_spec(summary, dist_obj, params, dist_name),
+                           use_container_width=True)
+    else:
+        fig, ax, line = get_plot_figure(key, summary)
+        update_fit_line(ax, line, dist_obj, params, dist_name)
+        st.pyplot(fig)
+
+@st.cache_resource(show_spinner=False)
+def get_process_pool():
+    """Process pool shared by all sessions for parallel fitting"""
+    workers = min(len(DISTRIBUTIONS), os.cpu_count() or 1)
+    return ProcessPoolExecutor(max_workers=workers)
+
+# Seconds between checks for newly appended data when tailing a file
+STREAM_POLL_SECONDS = 2
+
+# Histogram bars drawn for a stream (the fit uses the full-resolution counts)
+STREAM_PLOT_BINS = 50
+
+def get_stream(source_key, tail_path=None):
+    """This session's DataStream state for a source, started afresh when the source changes"""
+    stream = st.session_state.get('stream')
+    if stream is None or stream['key'] != source_key:
+        stream = {
+            'key': source_key,
+            'data': engine.DataStream(),
+            'tail': engine.FileTail(tail_path) if tail_path else None,
+            'fits': {}
+        }
+        st.session_state['stream'] = stream
+    return stream
+
+def append_stream_batch(stream):
+    """Button callback: fold the pasted values into the stream and clear the box"""
+    try:
+        stream['data'].append(parse_data(st.session_state['stream_batch']))
+    except DataParseError as e:
+        st.session_state['stream_error'] = f"Invalid data format: {e}"
+        return
+    st.session_state['stream_batch'] = ''
+
+def reset_stream():
+    st.session_state.pop('stream', None)
+
+# Resample counts and confidence levels offered for bootstrap intervals
+BOOTSTRAP_RESAMPLES = [100, 200, 500, 1000]
+BOOTSTRAP_CONFIDENCE = [0.8, 0.9, 0.95, 0.99]
+
+def show_bootstrap_intervals(data, dist_obj, params, param_names, fit_options):
+    """Bootstrap controls, progress bar and per-parameter percentile intervals
     
-    # Create distribution object with fitted parameters (like example: dist = gamma(*params))
-    dist = dist_obj(*params)
+    Estimates are kept in session state per dataset, distribution, fit options
+    and resample count, so changing the confidence level does not refit.
+    Pressing Cancel (or any other widget) interrupts the run, and batches not
+    yet started on the process pool are cancelled.
+    """
+    boot_col1, boot_col2 = st.columns(2)
+    with boot_col1:
+        n_resamples = st.select_slider("Resamples", BOOTSTRAP_RESAMPLES, value=200,
+                                       key='bootstrap_resamples')
+    with boot_col2:
+        confidence = st.select_slider("Confidence", BOOTSTRAP_CONFIDENCE, value=0.95,
+                                      format_func=lambda c: f"{c:.0%}", key='bootstrap_confidence')
     
-    # Create x range for fitted distribution (like example: x = np.linspace(0, 25, 100))
-    x_min = max(0, data.min() - 1)
-    x_max = data.max() + 1
-    x = np.linspace(x_min, x_max, 100)
+    job_key = (data_fingerprint(data), dist_obj.name, tuple(sorted(fit_options.items())), n_resamples)
+    previous = st.session_state.get('bootstrap_estimates')
+    if previous is None or previous['key'] != job_key:
+        if not st.button("Run bootstrap", key='run_bootstrap'):
+            return
+        st.button("Cancel", key='cancel_bootstrap')
+        progress = st.progress(0.0, text=f"Fitting {n_resamples} resamples...")
+        with stage(f'bootstrap[{dist_obj.name}]'):
+            estimates = engine.bootstrap_fit(
+                data, dist_obj, params, n_resamples, executor=get_process_pool(),
+                on_progress=lambda done, total: progress.progress(
+                    done / total, text=f"Fitted {done} of {total} resamples"),
+                **fit_options
+            )
+        progress.empty()
+        previous = {'key': job_key, 'estimates': estimates}
+        st.session_state['bootstrap_estimates'] = previous
     
-    # Get fitted distribution PDF (like example: fit = dist.pdf(x))
-    fit = dist.pdf(x)
+    estimates = previous['estimates']
+    lower, upper = engine.bootstrap_intervals(estimates, confidence)
+    st.table(pd.DataFrame({
+        'Parameter': param_names,
+        'Estimate': [f'{v:.6f}' for v in params],
+        'Lower': [f'{v:.6f}' for v in lower],
+        'Upper': [f'{v:.6f}' for v in upper]
+    }))
+    failed = int(np.isnan(estimates).any(axis=1).sum())
+    if failed:
+        st.caption(f"{failed} of {len(estimates)} resamples failed to fit and were ignored")
+
+def fit_columns_streaming(uploaded_file, columns, dist_names, fit_options, on_result):
+    """Fit each file column against dist_names in parallel, one pool job per column
     
-    # Plot fitted distribution line first (like example: ax.plot(x, fit))
-    ax.plot(x, fit, color='#e94560', linewidth=2.5, label=f'Fitted {dist_name}')
+    Only the column's float array is sent to a worker, never the DataFrame.
+    on_result(rows) is called with all rows so far each time a column finishes.
+    Completed results are kept in session state and reused on later reruns.
+    """
+    job_key = (uploaded_file.file_id, tuple(columns), tuple(dist_names),
+               tuple(sorted(fit_options.items())))
+    previous = st.session_state.get('column_fits')
+    if previous is not None and previous['key'] == job_key:
+        on_result(previous['rows'])
+        return previous['rows']
     
-    # Plot histogram second (like example: ax.hist(data, bins=25, density=True))
-    ax.hist(data, bins=25, density=True, alpha=0.7, color='#5eaaa8', edgecolor='#2c5282', label='Data')
+    loaded = load_columns(uploaded_file, columns)
+    pool = get_process_pool()
+    futures = {pool.submit(engine.fit_and_score, loaded[column][0], dist_names, **fit_options): column
+               for column in columns}
     
-    ax.set_xlabel('Value', fontsize=12, fontfamily='sans-serif', color='#000000', labelpad=10)
-    ax.set_ylabel('Density', fontsize=12, fontfamily='sans-serif', color='#000000', labelpad=10)
-    ax.set_title(f'Data Distribution with Fitted {dist_name}', fontsize=14, fontweight='400', 
-                 fontfamily='sans-serif', color='#2c3e50', pad=15)
-    ax.legend(fontsize=11, framealpha=0.95, facecolor='#f8f9fa', edgecolor='#bdc3c7', 
-              labelcolor='#2c3e50', loc='best')
-    ax.grid(True, alpha=0.3, linestyle='--', color='#95a5a6')
-    ax.tick_params(colors='#000000', labelsize=10, pad=5)
+    rows = []
+    for future in as_completed(futures):
+        rows.extend({'Column': futures[future], **row} for row in future.result())
+        on_result(rows)
+    st.session_state['column_fits'] = {'key': job_key, 'rows': rows}
+    return rows
+
+def column_fit_matrix(rows):
+    """Column-by-distribution table of KS statistic, p-value and MSE"""
+    metrics = {'KS Statistic': 'KS', 'KS p-value': 'p', 'MSE': 'MSE'}
+    long = pd.DataFrame(rows).reindex(columns=['Column', 'Distribution', *metrics])
+    wide = long.pivot(index='Column', columns='Distribution', values=list(metrics))
+    wide = wide.swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+    wide.columns = [f"{dist} {metrics[metric]}" for dist, metric in wide.columns]
+    return wide
+
+def show_leaderboard(placeholder, data, results, rank_by, method=None):
+    """Rank the fits in results ({name: (params, error)}) into a styled leaderboard
     
-    # Set spine colors - neutral gray
-    for spine in ax.spines.values():
-        spine.set_edgecolor('#bdc3c7')
-        spine.set_linewidth(1)
+    Metrics are kept in the result store under `method` (see get_fit_quality).
+    """
+    all_params = {name: params for name, (params, error) in results.items()}
+    summary = get_data_summary(data)
+    scores = {}
+    for name, params in all_params.items():
+        if params is not None:
+            try:
+                scores[name] = get_fit_quality(data, name, params, {}, summary, method)
+            except Exception:
+                pass
+    leaderboard = engine.rank_fits(data, all_params, rank_by, summary, scores)
+    placeholder.dataframe(
+        leaderboard.style.format({
+            'KS Statistic': '{:.5f}', 'KS p-value': '{:.5f}',
+            'AD Statistic': '{:.4f}', 'CvM Statistic': '{:.4f}',
+            'MSE': '{:.5f}', 'AIC': '{:.2f}', 'BIC': '{:.2f}'
+        }, na_rep='failed'),
+        use_container_width=True
+    )
+    return leaderboard
 
-# ============================================================================
-# DATA INPUT SECTION (Manual Entry + CSV Upload)
-# ============================================================================
+@st.cache_resource(max_entries=RACE_CACHE_SIZE, show_spinner=False)
+def _cached_race(data_key, rank_by, _data):
+    cache_miss()
+    return engine.race_distributions(_data, sort_by=rank_by, executor=get_process_pool(),
+                                     timeout=FIT_TIMEOUT)
 
-# Create two-column layout for data input and configuration
-input_col, config_col = st.columns([1, 1])
+def race_fits(data, rank_by):
+    """engine.race_distributions on the process pool, shared by every session
+    
+    Returns (results, eliminated): results is {name: (params, error)} for the
+    finalists, as from run_fits, and eliminated is a DataFrame of the other
+    distributions with the subsample size and score they were dropped at.
+    Each fit gets FIT_TIMEOUT seconds, as a fit job does, and counts as
+    failed after that.
+    """
+    fitted, rounds = _cached_race(data_fingerprint(data), rank_by, data)
+    results = {name: (params, None if params is not None else "Full-data fit failed or timed out")
+               for name, params in fitted.items()}
+    eliminated = pd.DataFrame([
+        {'Distribution': name, 'Subsample': race_round['size'], rank_by: score}
+        for race_round in rounds for name, score in race_round['scores'].items()
+        if name not in race_round['kept']
+    ], columns=['Distribution', 'Subsample', rank_by])
+    return results, eliminated
 
-with input_col:
-    st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Data Input</p>", unsafe_allow_html=True)
+def render_page():
+    """Data input, batch fitting, streaming and fitting sections of the page
     
-    input_method = st.radio("Choose input method:", ["Manual Entry", "CSV Upload"])
+    A function rather than top-level script code so that profiling can stop
+    in a finally block when a rerun is interrupted.
+    """
+    # ========================================================================
+    # DATA INPUT SECTION (Manual Entry + File Upload + Stream)
+    # ========================================================================
     
-    data = None
+    # Create two-column layout for data input and configuration
+    input_col, config_col = st.columns([1, 1])
     
-    # Manual data entry
-    if input_method == "Manual Entry":
-        st.markdown("**Enter data (comma or space-separated):**")
-        data_input = st.text_area(
-            "Data values:", 
-            value="3.20719972771444,2.87129040067153,5.78729035553647,4.1187091291734,4.38892441143452,5.51983579411947,7.90659610041574,14.2464130461306,5.53262079779466,8.71231628950114,4.11483534889389,4.21676261414512,3.80742490832028,8.12295261344642,14.4931193240959,4.17061928235844,5.56473369646821,3.85601850903497,6.65482199070973,5.64527500798778,3.69470891623014,5.71475936880442,6.42321075793331,4.18764978676313,8.48363880632814,4.3185065867552,2.63868243051386,12.063722658557,4.53786350503291,4.01908595867652,3.67080036194595,10.0441547890996,5.7819839771617,1.53178808027106,5.98977516511071,10.9771080475445,3.47981915074114,3.17809729624012,5.76866572512802,2.65246319401473,3.1704720430555,7.26893066922843,4.10425656738533,12.0308139249766,21.8249355000441,6.44870668778663,3.63812351193026,6.87382124371665,15.2735394703434,7.38970347326533,2.69998527504317,10.4273336307952,6.11206256383201,4.5920968801287,8.65133221986743,2.62055704470486,6.99683810153907,2.98062919587173,4.44388439043336,5.7530123869902,11.1124482663633,7.78578215883215,4.45029285710677,1.9727820396507,5.99676189263169,3.05730606830652,4.19050957866747,4.3724444814354,9.25822133955263,4.84488764535786,5.67149615372399,5.3289426461222,9.0276128378506,5.00796339010461,5.10030909308932,4.69790795067666,7.52632897929432,4.9432432444583,11.5095934486767,6.68703481963587,5.36989828756535,2.29582109778393,4.53261357074735,1.3226152010431,6.46993019723354,6.48511130955385,3.67395379810723,1.61658582601082,5.17157558544848,3.43650525236362,2.56686623161152,10.703070445034,1.22466181525404,11.9659048285323,3.93698457790289,3.10356261351468,8.07916089821821,5.06656410453392,10.0288206488804,3.44832191263857,5.07295045294818,4.22728051634265,8.88562310807271,3.84281527048915,6.47788459861068,6.07548869902777,6.29919843406497,4.45789001647914,6.59424659355596,4.33996583353805,2.35516092352541,5.60138675446724,9.43844175490494,4.8860664222843,6.78064974445323,3.46240429257522,8.28805367606514,5.19882192072884,10.2912444101418,3.88644312039273,6.01722622261898,3.71435586640654,4.06180331827025,11.0186237458849,4.41400877553267,4.16134185809148,4.91200853465936,6.14435929476508,3.55579341389526,5.73429009051356,5.1294029169288,5.60122206224381,6.84017537770627,8.23087537861028,5.18312112841531,5.75281442321041,9.58988963769102,2.9058171022862,5.59304032555758,9.95151206607703,9.66457378942286,5.49615658235129,8.28272314889447,5.28974619521139,5.20566317110165,5.1000088024874,5.2890307999594,2.56771471526227,5.41792929120541,8.2485514308283,4.22191248192974,4.18076760394355,3.82490004086774,8.11389467048772,8.17905131591077,2.20512940572033,6.1765196159511,5.64754846416467,7.00670902696149,4.02765634906512,4.14404501418002,3.22816913193604,2.18199137644284,6.17377233089113,4.03767675198414,13.1038052247289,2.19622347217905,4.68070673320595,12.1949138405277,8.54480269571011,4.85111956334843,6.70336942540735,3.23983016542715,5.13082252805444,5.14034177125895,3.4500631319645,7.69852037593398,7.66067049651481,4.16704555356684,4.64433437519586,7.29709139509208,8.19689822731976,11.9751925513851,3.54835361661994,3.89538081803005,5.36146734662152,6.12853671472484,6.23729711901194,3.18961479193869,4.49869589427826,5.76699781603703,6.79504390544921,7.83808323775473,7.76370178578931,3.41926767683594,3.27150688906948,7.56221751278802,8.57238196888134,3.0765656184776,5.31089267521916,3.79480934458552,7.74123456631936,4.04293995118258,9.45300780752185,6.72875943280427,5.35280044337538,2.15342431043033,9.00869311350449,8.30744889962753,8.49287308892036,3.43574809492756,6.13125665675564,9.04021143433454,3.29155021747036,7.35193441805941,7.93653368794213,5.51273094986878,3.38505308966638,2.17589265177759,5.28359279669062,3.47787799463508,5.70752638327164,12.3440437363526,8.19775479403202,10.0806903838118,5.9589068571708,12.2163422772414,2.96748610500741,7.20615636174274,6.34709075641611,6.90605193626859,5.84570188576078,3.45223828038286,8.28021204179474,8.07741844411617,6.46258440661766,6.47332011707804,5.77997972475852,4.98712218243283,3.7878154328551,4.45010616191702,4.75073481008442,4.94080420237503,4.67071100284309,7.27182797493035,7.63637295804752,7.05061070885306,3.30625540738865,3.32740983130141,5.48648934067196,13.4942731235184,2.66508048593565,3.73431560512329,8.54873951859126,3.93630090207988,3.51387025872032,6.03884431177219,13.2520796624539,3.47724256999982,2.38089690325795,7.06417115042977,2.31287956003781,4.60300305335662,5.80900906296062,8.5280212845338,7.44065156091036,7.37113842821828,2.48071561825698,8.27551743348859,7.62851209755008,14.8463629750269,1.97366155087844,11.3385820582077,12.9235625000801,4.86997860978972,4.67229728246753,6.39106356800049,7.19006181092422,4.83047630071042,5.85611253081715,5.20524797573404,2.95765269217928,4.36396317148357,7.09467564481347,10.9468053627988,2.50978020482316,3.52717687279868,6.71782276292188,9.15259518023441,2.68857447805955,10.0808514960569,8.03574389469412,5.79714672725919,4.1872049557106,11.9288445669464,8.10968839913708,1.77864080725759,5.60584129153289,1.92835903620831,13.4832090703276,5.85409752740415,3.55878047647453,6.09871429579707,5.45548827523139,6.94343519310369,5.27509422952383,4.94982694067812,10.471718557911,1.77057226461722,3.69962266030213,5.59224209088963,7.66538495869249,4.20035415007028,7.66037258134326,8.39006483678768,3.41869365885651,8.36740667317747,10.2783276977061,6.70907111542578,3.22267743708372,3.94077915551577,4.11403066964048,7.12254337694263,2.65517135856564,3.26947338757178,4.34293168807362,6.8627027165066,6.27606257247508,3.21584070637301,13.2155117170111,8.20594013328869,4.12458883918245,13.1723796744834,6.14505378032772,11.1283872136079,5.13853537074475,6.79394165269215,5.1593727890658,3.494845791221,5.76450590113332,10.1590680869197,5.42034807894333,6.89824348598303,6.90982287851876,6.71198773190657,5.86697282937759,3.05912935538379,7.45018667041063,5.77763943802571,6.02237525913843,4.44486789665648,8.43899300884028,9.89980957197258,2.13917081686202,9.04758331562325,5.21589097754136,5.05051795371087,6.19232575758405,9.34085189994595,7.29999158070182,6.0360161689356,5.28295115985372,12.9050616162865,5.29128883361962,5.33917562620091,1.65183035925921,6.50515769496072,10.3273944312599,4.18491510991607,6.70390599756346,6.05609544102602,6.83143185227753,8.05545860819656,7.53064725709318,6.05514510681038,6.77985263169223,5.5998540044362,5.82729095356518,4.90532890949783,2.05819896885312,4.31627755871944,4.97274607016806,5.19008822765649,5.61323506069641,6.42173147122194,8.37088732788796,8.00653418538846,4.26151440996175,3.5610062690827,11.4881692078432,2.11242270358537,9.47990149815404,6.7336211984959,5.55430353064164,2.2263654184052,4.62282884499259,2.46503220986232,6.19639933253168,5.19919117910693,4.51674152090613,5.95862919168961,5.79547393573955,5.0125526342321,6.31453717410042,3.63827247163645,2.94742708415586,4.07036706162421,1.47647754913847,3.57712328263973,7.44637152383954,3.16190215467574,5.75208828843793,4.10255336743796,4.81862201715808,3.79939241194872,5.17243280082671,3.06406946393343,11.9053579343422,7.81508667499838,5.98551989978803,7.85494766404866,2.12513112441248,4.43488977253895,6.44611493373454,2.11948116009652,9.20208149946354,3.31366556168537,4.50709565424868,3.28603074670195,4.8929953822012,5.3657171341465,7.73829687257827,5.85321148073022,6.20349342057683,4.39997866283304,8.03774019789768,4.70706577894645,4.21495196258795,6.54380798571769,9.69078065348202,5.51482371040456,8.21135544965855,4.47816186016272,8.6936333631899,4.47511363819238,3.3045496790252,4.00066954789961,5.80997389686452,3.25730377969715,5.29120351391087,3.17282161593051,8.72179661748884,6.26631351938951,3.86933963749373,13.5564464662075,4.63895771438481,4.00235872916829,6.94127902865297,5.65073634548882,6.41508657595473,6.6214554939705,9.41747685659003,8.41032195911151,5.69966980297061,8.19375435617369,2.8817762300048,4.13312527405593,8.44950812841548,6.07520666698793,3.72358613076008,4.76270422283332,5.72918987950143,1.3358861774612,14.2288509876231,5.71310921498087,3.25797679434852,10.5094867242265,6.1070129862946,4.37606154054595,8.43333585480916,6.50298869700406,5.66632544088042,6.71147112350744,5.12376474745983,4.40387660693527,5.18996592723948,2.85248380353141,5.80619480255206,5.37665868177875,8.26819279705691,2.55067216666738,5.44285401170707,5.79445997583341,7.11685652729147,3.96329857357491,3.62366770330987,4.69514392893429,6.29455202808252,5.25986377888816,4.81058812846268,3.50950231930442,5.94934007549484,3.47524774674799,5.00686028347549,4.4708858046076,4.06790804231522,4.82345501446795,5.42292053762581,2.80645729401069,9.30989593398334,8.38700932596938,7.33669059721859,4.82647866672544,6.08220143251275,4.4179595473059,13.5705876270001,3.71981640181635,3.86848052062754,5.59163526301393,2.69206767991973,4.42967389685432,10.8852822442574,5.72351672914615,3.07801483382221,9.99441275712819,4.41124510578886,2.86392022717056,5.09673008147755,4.26574401574091,8.27245343520375,8.19764468442208,2.98352798268172,1.75769488964269,5.43054098103716,7.95757358478887,4.02827269189121,5.16018809793742",
-            height=150,
-            help="Enter numbers separated by commas or spaces",
-            label_visibility="collapsed"
+    with input_col:
+        st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Data Input</p>", unsafe_allow_html=True)
+        
+        input_method = st.radio("Choose input method:", ["Manual Entry", "File Upload", "Stream"])
+        
+        # Quantized data with many repeats can be held as distinct values and counts
+        compact = input_method != "Stream" and st.toggle(
+            "Compact repeated values",
+            key='compact_data',
+            help="Store each distinct value once with its count, while reading. Memory, fitting, "
+                 "statistics and plots then scale with the number of distinct values instead of "
+                 "the sample size."
         )
-        if data_input:
-            data = parse_data(data_input)
-            if data is not None and len(data) > 0:
-                st.success(f"Loaded {len(data)} data points")
+        
+        data = None
+        data_stats = None
+        batch_file = None
+        stream = None
+        
+        # Manual data entry
+        if input_method == "Manual Entry":
+            st.markdown("**Enter data (comma or space-separated):**")
+            data_input = st.text_area(
+                "Data values:", 
+                value="3.20719972771444,2.87129040067153,5.78729035553647,4.1187091291734,4.38892441143452,5.51983579411947,7.90659610041574,14.2464130461306,5.53262079779466,8.71231628950114,4.11483534889389,4.21676261414512,3.80742490832028,8.12295261344642,14.4931193240959,4.17061928235844,5.56473369646821,3.85601850903497,6.65482199070973,5.64527500798778,3.69470891623014,5.71475936880442,6.42321075793331,4.18764978676313,8.48363880632814,4.3185065867552,2.63868243051386,12.063722658557,4.53786350503291,4.01908595867652,3.67080036194595,10.0441547890996,5.7819839771617,1.53178808027106,5.98977516511071,10.9771080475445,3.47981915074114,3.17809729624012,5.76866572512802,2.65246319401473,3.1704720430555,7.26893066922843,4.10425656738533,12.0308139249766,21.8249355000441,6.44870668778663,3.63812351193026,6.87382124371665,15.2735394703434,7.38970347326533,2.69998527504317,10.4273336307952,6.11206256383201,4.5920968801287,8.65133221986743,2.62055704470486,6.99683810153907,2.98062919587173,4.44388439043336,5.7530123869902,11.1124482663633,7.78578215883215,4.45029285710677,1.9727820396507,5.99676189263169,3.05730606830652,4.19050957866747,4.3724444814354,9.25822133955263,4.84488764535786,5.67149615372399,5.3289426461222,9.0276128378506,5.00796339010461,5.10030909308932,4.69790795067666,7.52632897929432,4.9432432444583,11.5095934486767,6.68703481963587,5.36989828756535,2.29582109778393,4.53261357074735,1.3226152010431,6.46993019723354,6.48511130955385,3.67395379810723,1.61658582601082,5.17157558544848,3.43650525236362,2.56686623161152,10.703070445034,1.22466181525404,11.9659048285323,3.93698457790289,3.10356261351468,8.07916089821821,5.06656410453392,10.0288206488804,3.44832191263857,5.07295045294818,4.22728051634265,8.88562310807271,3.84281527048915,6.47788459861068,6.07548869902777,6.29919843406497,4.45789001647914,6.59424659355596,4.33996583353805,2.35516092352541,5.60138675446724,9.43844175490494,4.8860664222843,6.78064974445323,3.46240429257522,8.28805367606514,5.19882192072884,10.2912444101418,3.88644312039273,6.01722622261898,3.71435586640654,4.06180331827025,11.0186237458849,4.41400877553267,4.16134185809148,4.91200853465936,6.14435929476508,3.55579341389526,5.73429009051356,5.1294029169288,5.60122206224381,6.84017537770627,8.23087537861028,5.18312112841531,5.75281442321041,9.58988963769102,2.9058171022862,5.59304032555758,9.95151206607703,9.66457378942286,5.49615658235129,8.28272314889447,5.28974619521139,5.20566317110165,5.1000088024874,5.2890307999594,2.56771471526227,5.41792929120541,8.2485514308283,4.22191248192974,4.18076760394355,3.82490004086774,8.11389467048772,8.17905131591077,2.20512940572033,6.1765196159511,5.64754846416467,7.00670902696149,4.02765634906512,4.14404501418002,3.22816913193604,2.18199137644284,6.17377233089113,4.03767675198414,13.1038052247289,2.19622347217905,4.68070673320595,12.1949138405277,8.54480269571011,4.85111956334843,6.70336942540735,3.23983016542715,5.13082252805444,5.14034177125895,3.4500631319645,7.69852037593398,7.66067049651481,4.16704555356684,4.64433437519586,7.29709139509208,8.19689822731976,11.9751925513851,3.54835361661994,3.89538081803005,5.36146734662152,6.12853671472484,6.23729711901194,3.18961479193869,4.49869589427826,5.76699781603703,6.79504390544921,7.83808323775473,7.76370178578931,3.41926767683594,3.27150688906948,7.56221751278802,8.57238196888134,3.0765656184776,5.31089267521916,3.79480934458552,7.74123456631936,4.04293995118258,9.45300780752185,6.72875943280427,5.35280044337538,2.15342431043033,9.00869311350449,8.30744889962753,8.49287308892036,3.43574809492756,6.13125665675564,9.04021143433454,3.29155021747036,7.35193441805941,7.93653368794213,5.51273094986878,3.38505308966638,2.17589265177759,5.28359279669062,3.47787799463508,5.70752638327164,12.3440437363526,8.19775479403202,10.0806903838118,5.9589068571708,12.2163422772414,2.96748610500741,7.20615636174274,6.34709075641611,6.90605193626859,5.84570188576078,3.45223828038286,8.28021204179474,8.07741844411617,6.46258440661766,6.47332011707804,5.77997972475852,4.98712218243283,3.7878154328551,4.45010616191702,4.75073481008442,4.94080420237503,4.67071100284309,7.27182797493035,7.63637295804752,7.05061070885306,3.30625540738865,3.32740983130141,5.48648934067196,13.4942731235184,2.66508048593565,3.73431560512329,8.54873951859126,3.93630090207988,3.51387025872032,6.03884431177219,13.2520796624539,3.47724256999982,2.38089690325795,7.06417115042977,2.31287956003781,4.60300305335662,5.80900906296062,8.5280212845338,7.44065156091036,7.37113842821828,2.48071561825698,8.27551743348859,7.62851209755008,14.8463629750269,1.97366155087844,11.3385820582077,12.9235625000801,4.86997860978972,4.67229728246753,6.39106356800049,7.19006181092422,4.83047630071042,5.85611253081715,5.20524797573404,2.95765269217928,4.36396317148357,7.09467564481347,10.9468053627988,2.50978020482316,3.52717687279868,6.71782276292188,9.15259518023441,2.68857447805955,10.0808514960569,8.03574389469412,5.79714672725919,4.1872049557106,11.9288445669464,8.10968839913708,1.77864080725759,5.60584129153289,1.92835903620831,13.4832090703276,5.85409752740415,3.55878047647453,6.09871429579707,5.45548827523139,6.94343519310369,5.27509422952383,4.94982694067812,10.471718557911,1.77057226461722,3.69962266030213,5.59224209088963,7.66538495869249,4.20035415007028,7.66037258134326,8.39006483678768,3.41869365885651,8.36740667317747,10.2783276977061,6.70907111542578,3.22267743708372,3.94077915551577,4.11403066964048,7.12254337694263,2.65517135856564,3.26947338757178,4.34293168807362,6.8627027165066,6.27606257247508,3.21584070637301,13.2155117170111,8.20594013328869,4.12458883918245,13.1723796744834,6.14505378032772,11.1283872136079,5.13853537074475,6.79394165269215,5.1593727890658,3.494845791221,5.76450590113332,10.1590680869197,5.42034807894333,6.89824348598303,6.90982287851876,6.71198773190657,5.86697282937759,3.05912935538379,7.45018667041063,5.77763943802571,6.02237525913843,4.44486789665648,8.43899300884028,9.89980957197258,2.13917081686202,9.04758331562325,5.21589097754136,5.05051795371087,6.19232575758405,9.34085189994595,7.29999158070182,6.0360161689356,5.28295115985372,12.9050616162865,5.29128883361962,5.33917562620091,1.65183035925921,6.50515769496072,10.3273944312599,4.18491510991607,6.70390599756346,6.05609544102602,6.83143185227753,8.05545860819656,7.53064725709318,6.05514510681038,6.77985263169223,5.5998540044362,5.82729095356518,4.90532890949783,2.05819896885312,4.31627755871944,4.97274607016806,5.19008822765649,5.61323506069641,6.42173147122194,8.37088732788796,8.00653418538846,4.26151440996175,3.5610062690827,11.4881692078432,2.11242270358537,9.47990149815404,6.7336211984959,5.55430353064164,2.2263654184052,4.62282884499259,2.46503220986232,6.19639933253168,5.19919117910693,4.51674152090613,5.95862919168961,5.79547393573955,5.0125526342321,6.31453717410042,3.63827247163645,2.94742708415586,4.07036706162421,1.47647754913847,3.57712328263973,7.44637152383954,3.16190215467574,5.75208828843793,4.10255336743796,4.81862201715808,3.79939241194872,5.17243280082671,3.06406946393343,11.9053579343422,7.81508667499838,5.98551989978803,7.85494766404866,2.12513112441248,4.43488977253895,6.44611493373454,2.11948116009652,9.20208149946354,3.31366556168537,4.50709565424868,3.28603074670195,4.8929953822012,5.3657171341465,7.73829687257827,5.85321148073022,6.20349342057683,4.39997866283304,8.03774019789768,4.70706577894645,4.21495196258795,6.54380798571769,9.69078065348202,5.51482371040456,8.21135544965855,4.47816186016272,8.6936333631899,4.47511363819238,3.3045496790252,4.00066954789961,5.80997389686452,3.25730377969715,5.29120351391087,3.17282161593051,8.72179661748884,6.26631351938951,3.86933963749373,13.5564464662075,4.63895771438481,4.00235872916829,6.94127902865297,5.65073634548882,6.41508657595473,6.6214554939705,9.41747685659003,8.41032195911151,5.69966980297061,8.19375435617369,2.8817762300048,4.13312527405593,8.44950812841548,6.07520666698793,3.72358613076008,4.76270422283332,5.72918987950143,1.3358861774612,14.2288509876231,5.71310921498087,3.25797679434852,10.5094867242265,6.1070129862946,4.37606154054595,8.43333585480916,6.50298869700406,5.66632544088042,6.71147112350744,5.12376474745983,4.40387660693527,5.18996592723948,2.85248380353141,5.80619480255206,5.37665868177875,8.26819279705691,2.55067216666738,5.44285401170707,5.79445997583341,7.11685652729147,3.96329857357491,3.62366770330987,4.69514392893429,6.29455202808252,5.25986377888816,4.81058812846268,3.50950231930442,5.94934007549484,3.47524774674799,5.00686028347549,4.4708858046076,4.06790804231522,4.82345501446795,5.42292053762581,2.80645729401069,9.30989593398334,8.38700932596938,7.33669059721859,4.82647866672544,6.08220143251275,4.4179595473059,13.5705876270001,3.71981640181635,3.86848052062754,5.59163526301393,2.69206767991973,4.42967389685432,10.8852822442574,5.72351672914615,3.07801483382221,9.99441275712819,4.41124510578886,2.86392022717056,5.09673008147755,4.26574401574091,8.27245343520375,8.19764468442208,2.98352798268172,1.75769488964269,5.43054098103716,7.95757358478887,4.02827269189121,5.16018809793742",
+                height=150,
+                help="Enter numbers separated by commas or spaces",
+                label_visibility="collapsed"
+            )
+            if data_input:
+                try:
+                    with stage('parse', cached=True):
+                        data = parse_data(data_input, compact)
+                except DataParseError as e:
+                    st.error(f"Invalid data format: {e}")
+                else:
+                    if len(data) > 0:
+                        st.success(f"Loaded {len(data)} data points")
+                    else:
+                        st.error("Invalid data format")
+        
+        # CSV or binary (.npy / Parquet / Arrow) file upload
+        elif input_method == "File Upload":
+            uploaded_file = st.file_uploader(
+                "Upload CSV, .npy, Parquet or Arrow file",
+                type=['csv'] + [ext.lstrip('.') for ext in BINARY_FORMATS]
+            )
+            if uploaded_file is not None:
+                try:
+                    binary_kind = binary_format(uploaded_file.name)
+                    if binary_kind is None:
+                        # Read only the header and first rows for the preview
+                        uploaded_file.seek(0)
+                        preview = pd.read_csv(uploaded_file, nrows=5)
+                        
+                        # Show dataframe preview
+                        st.markdown("**Preview:**")
+                        st.dataframe(preview, use_container_width=True)
+                        numeric_columns = list(preview.select_dtypes('number').columns)
+                        
+                        # Let user select column, then stream just that column
+                        column = st.selectbox("Select data column:", preview.columns)
+                        with st.spinner(f"Reading '{column}'..."), stage('read csv', cached=True):
+                            data, data_stats = load_csv_column(uploaded_file.file_id, column, compact, uploaded_file)
+                    else:
+                        # Binary files are read straight into float arrays, no parsing
+                        numeric_columns = list_binary_columns(uploaded_file.file_id, binary_kind, uploaded_file)
+                        column = st.selectbox("Select data column:", numeric_columns)
+                        if column is None:
+                            raise ValueError("no numeric columns found")
+                        with st.spinner(f"Reading '{column}'..."), stage(f'read {binary_kind}', cached=True):
+                            data, data_stats = load_binary_columns(
+                                uploaded_file.file_id, binary_kind, (column,), compact, uploaded_file)[column]
+                    st.success(f"Loaded {len(data)} data points from '{column}'")
+                    
+                    # Optionally fit every numeric column at once (shown below)
+                    if st.toggle("Fit all numeric columns", key='batch_columns',
+                                 help=f"Fit all {len(numeric_columns)} numeric columns in parallel"):
+                        batch_file = uploaded_file
+                except Exception as e:
+                    st.error(f"Error reading file: {e}")
+        
+        # Streaming: data arrives over time and only new values are processed
+        else:
+            stream_source = st.radio("Stream source:", ["Append batches", "Tail a file"],
+                                     horizontal=True, key='stream_source')
+            if stream_source == "Tail a file":
+                tail_path = st.text_input(
+                    "File to tail:",
+                    key='stream_path',
+                    help=f"Local text file of comma or space-separated values. "
+                         f"Appended values are read every {STREAM_POLL_SECONDS}s."
+                )
+                if tail_path and not os.path.isfile(tail_path):
+                    st.error(f"File not found: {tail_path}")
+                elif tail_path:
+                    stream = get_stream(('tail', tail_path), tail_path)
             else:
-                st.error("Invalid data format")
+                stream = get_stream(('append',))
+                st.text_area("Values to append:", key='stream_batch', height=100,
+                             help="Enter numbers separated by commas or spaces")
+                st.button("Append batch", on_click=append_stream_batch, args=(stream,))
+                if 'stream_error' in st.session_state:
+                    st.error(st.session_state.pop('stream_error'))
+            
+            if stream is not None:
+                st.button("Reset stream", on_click=reset_stream)
+        
+        if compact and data is not None and len(data) > 0:
+            st.caption(f"{data.count} values stored as {len(data.values)} distinct {data.values.dtype} values "
+                       f"({data.nbytes / 2 ** 10:.1f} KiB)")
     
-    # CSV file upload
-    else:
-        uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
-        if uploaded_file is not None:
-            try:
-                df = pd.read_csv(uploaded_file)
-                
-                # Show dataframe preview
-                st.markdown("**Preview:**")
-                st.dataframe(df.head(), use_container_width=True)
-                
-                # Let user select column
-                column = st.selectbox("Select data column:", df.columns)
-                data = df[column].dropna().values
-                st.success(f"Loaded {len(data)} data points from '{column}'")
-            except Exception as e:
-                st.error(f"Error reading file: {e}")
-
-with config_col:
-    st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Statistics</p>", unsafe_allow_html=True)
+    with config_col:
+        st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Statistics</p>", unsafe_allow_html=True)
+        
+        # Display data statistics
+        if data is not None and len(data) > 0:
+            # One summary per dataset feeds statistics, metrics, plots and sliders
+            with stage('summary', cached=True):
+                data_summary = get_data_summary(data, data_stats)
+            
+            st.markdown("**Data Statistics:**")
+            stat_col1, stat_col2 = st.columns(2)
+            with stat_col1:
+                st.metric("Count", data_summary.count)
+                st.metric("Mean", f"{data_summary.mean:.3f}")
+                st.metric("Std Dev", f"{data_summary.std:.3f}")
+            with stat_col2:
+                st.metric("Min", f"{data_summary.min:.3f}")
+                st.metric("Max", f"{data_summary.max:.3f}")
+                st.metric("Median", f"{data_summary.median:.3f}")
+        elif stream is not None:
+            st.info("Live statistics are shown in the Live Stream section below")
+        else:
+            st.info("Enter or upload data to see statistics")
     
-    # Display data statistics
-    if data is not None and len(data) > 0:
-        st.markdown("**Data Statistics:**")
-        stat_col1, stat_col2 = st.columns(2)
-        with stat_col1:
-            st.metric("Count", len(data))
-            st.metric("Mean", f"{np.mean(data):.3f}")
-            st.metric("Std Dev", f"{np.std(data):.3f}")
-        with stat_col2:
-            st.metric("Min", f"{np.min(data):.3f}")
-            st.metric("Max", f"{np.max(data):.3f}")
-            st.metric("Median", f"{np.median(data):.3f}")
-    else:
-        st.info("Enter or upload data to see statistics")
-
-st.markdown("---")
-
-# ============================================================================
-# AUTOMATIC FITTING SECTION
-# ============================================================================
-
-if data is not None and len(data) > 0:
-    tab1, tab2 = st.tabs(["Automatic Fitting", "Manual Fitting"])
+    st.markdown("---")
+    
+    # ========================================================================
+    # COLUMN BATCH FITTING SECTION
+    # ========================================================================
     
-    # Tab 1: Automatic Fitting
-    with tab1:
-        st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Automatic Distribution Fitting</p>", unsafe_allow_html=True)
+    if batch_file is not None:
+        st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Fit All Columns</p>", unsafe_allow_html=True)
         
-        # Create layout: controls on left, visualization on right
-        control_col, viz_col = st.columns([1, 2])
+        batch_dists = st.multiselect(
+            "Distributions to fit:",
+            list(DISTRIBUTIONS.keys()),
+            default=['Normal', 'Gamma', 'Lognormal', 'Weibull'],
+            key='batch_dists'
+        )
         
-        with control_col:
-            # Distribution selection
-            selected_dist = st.selectbox(
-                "Select distribution:",
-                list(DISTRIBUTIONS.keys()),
-                help="Choose a distribution to fit to your data",
-                key='auto_dist'
-            )
-            
-            st.markdown("---")
+        if numeric_columns and batch_dists:
+            matrix_placeholder = st.empty()
+            with st.spinner(f"Fitting {len(numeric_columns)} columns..."), stage('column batch'):
+                fit_columns_streaming(
+                    batch_file, numeric_columns, batch_dists,
+                    {'method': 'binned'} if st.session_state.get('binned_fit') else {},
+                    lambda rows: matrix_placeholder.dataframe(column_fit_matrix(rows), use_container_width=True)
+                )
+        elif not numeric_columns:
+            st.info("No numeric columns found in this file")
+        
+        st.markdown("---")
+    
+    # ========================================================================
+    # STREAMING SECTION
+    # ========================================================================
+    
+    def stream_panel(stream):
+        """Live statistics, histogram and fit of a stream
+        
+        Runs as a fragment. When tailing a file it reruns every
+        STREAM_POLL_SECONDS and folds in only the newly appended values. The fit
+        is redone only when new data has arrived, on the histogram counts, and
+        starts from the previous parameters for the selected distribution.
+        """
+        with RerunTimer('stream', st.session_state.get('session_id')):
+            data_stream = stream['data']
+            if stream['tail'] is not None:
+                try:
+                    with stage('stream read'):
+                        data_stream.append(stream['tail'].read_new())
+                except (OSError, DataParseError) as e:
+                    st.error(f"Could not read {stream['tail'].path}: {e}")
             
-            # Fit the distribution
-            dist_info = DISTRIBUTIONS[selected_dist]
-            dist_obj = dist_info['dist']
+            if data_stream.count == 0:
+                st.info("Waiting for data...")
+                return
             
-            with st.spinner(f"Fitting {selected_dist} distribution..."):
-                params = fit_distribution(data, dist_obj)
+            running = data_stream.stats
+            stat_cols = st.columns(5)
+            stat_cols[0].metric("Count", running.count)
+            stat_cols[1].metric("Mean", f"{running.mean:.3f}")
+            stat_cols[2].metric("Std Dev", f"{running.std:.3f}")
+            stat_cols[3].metric("Min", f"{running.min:.3f}")
+            stat_cols[4].metric("Max", f"{running.max:.3f}")
             
-            if params is not None:
+            control_col, viz_col = st.columns([1, 2])
+            with control_col:
+                stream_dist = st.selectbox("Select distribution:", list(DISTRIBUTIONS.keys()), key='stream_dist')
+                dist_info = DISTRIBUTIONS[stream_dist]
+                dist_obj = dist_info['dist']
+                
+                # Refit only on new data, warm-started from the last estimate
+                fitted = stream['fits'].get(stream_dist)
+                if fitted is None or fitted[0] != data_stream.count:
+                    try:
+                        with stage(f'stream fit[{stream_dist}]'):
+                            params = data_stream.refit(dist_obj, start=fitted[1] if fitted else None)
+                    except Exception as e:
+                        st.error(f"Failed to fit distribution: {type(e).__name__}: {e}")
+                        return
+                    fitted = (data_stream.count, params)
+                    stream['fits'][stream_dist] = fitted
+                params = fitted[1]
+                
                 st.markdown("<p style='font-weight:500; font-size:1.1rem; color:#f0f0f0; margin-bottom:0.5rem;'>Fitted Parameters</p>", unsafe_allow_html=True)
+                st.table(pd.DataFrame({'Parameter': dist_info['params'],
+                                       'Value': [f'{v:.6f}' for v in params]}))
+                st.caption(f"Binned fit to {len(data_stream.histogram.counts)} bins")
+            
+            with viz_col:
+                edges, density = data_stream.histogram.density(STREAM_PLOT_BINS)
+                st.vega_lite_chart(spec=histogram_chart_spec(edges, density, (edges[0], edges[-1]),
+                                                             dist_obj, params, stream_dist),
+                                   use_container_width=True)
+    
+    if stream is not None:
+        st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Live Stream</p>", unsafe_allow_html=True)
+        poll_every = STREAM_POLL_SECONDS if stream['tail'] is not None else None
+        st.fragment(stream_panel, run_every=poll_every)(stream)
+        st.markdown("---")
+    
+    # ========================================================================
+    # MANUAL FITTING FRAGMENT
+    # ========================================================================
+    
+    @st.fragment
+    def manual_fitting_fragment(data, data_summary, fit_options, interactive_charts):
+        """Manual Fitting controls, metrics and plot, rerun on their own
+        
+        As a fragment, slider and selectbox changes here rerun only this function,
+        not the data input, statistics or Automatic Fitting tab above it.
+        """
+        # Fragment-only reruns are timed and logged on their own; on a full rerun
+        # these stages are folded into the page's timings
+        with RerunTimer('manual fitting', st.session_state.get('session_id')):
+            # Create layout: controls on left, visualization on right
+            control_col, viz_col = st.columns([1, 2])
+            
+            with control_col:
+                # Distribution selection
+                manual_dist = st.selectbox(
+                    "Select distribution:",
+                    list(DISTRIBUTIONS.keys()),
+                    key='manual_dist',
+                    help="Choose a distribution to fit manually"
+                )
+                
+                dist_info = DISTRIBUTIONS[manual_dist]
+                dist_obj = dist_info['dist']
                 param_names = dist_info['params']
                 
-                # Create a nice table for parameters
-                param_data = []
-                for i, (name, value) in enumerate(zip(param_names, params)):
-                    param_data.append({'Parameter': name, 'Value': f'{value:.6f}'})
+                # Get automatic fit as starting point
+                with stage(f'manual fit[{manual_dist}]', cached=True):
+                    auto_params, fit_error = fit_distribution(data, manual_dist, 'manual', **fit_options)
+                if fit_error is not None:
+                    st.caption(f"Automatic fit failed ({fit_error}); sliders start at defaults")
                 
-                st.table(pd.DataFrame(param_data))
+                st.markdown("---")
+                
+                # Create sliders for each parameter
+                st.markdown("<p style='font-weight:500; font-size:1.1rem; color:#f0f0f0; margin-bottom:0.5rem;'>Adjust Parameters</p>", unsafe_allow_html=True)
+                
+                manual_params = []
+                
+                # Determine reasonable ranges for sliders
+                data_min, data_max = data_summary.min, data_summary.max
+                data_range = data_max - data_min
+                data_std = data_summary.std
+                
+                for i, param_name in enumerate(param_names):
+                    # Set default value from auto-fit if available
+                    default_val = auto_params[i] if auto_params is not None else 1.0
+                    
+                    # Set reasonable ranges based on parameter type
+                    if param_name in ['loc']:
+                        min_val = data_min - data_range
+                        max_val = data_max + data_range
+                        step = 0.1
+                        default_val = round(default_val, 1)
+                    elif param_name in ['scale']:
+                        min_val = 0.01
+                        max_val = data_range * 2
+                        step = 0.1
+                        default_val = max(0.1, round(default_val, 1))
+                    elif param_name in ['a', 'b', 'c', 's', 'df']:
+                        min_val = 0.1
+                        max_val = 10.0
+                        step = 0.1
+                        default_val = max(0.1, min(10.0, default_val))
+                    else:
+                        min_val = 0.1
+                        max_val = 10.0
+                        step = 0.1
+                        default_val = max(0.1, min(10.0, default_val))
+                    
+                    value = st.slider(
+                        param_name,
+                        min_value=float(min_val),
+                        max_value=float(max_val),
+                        value=float(default_val),
+                        step=float(step),
+                        format="%.2f" if param_name in ['loc', 'scale'] else "%.3f"
+                    )
+                    manual_params.append(value)
                 
                 st.markdown("---")
                 
-                # Display fit quality metrics
-                quality_metrics = calculate_fit_quality(data, dist_obj, params)
+                # Display fit quality metrics in lower left
                 st.markdown("<p style='font-weight:500; font-size:1.1rem; color:#f0f0f0; margin-bottom:0.5rem;'>Fit Quality</p>", unsafe_allow_html=True)
                 
-                metric_col1, metric_col2 = st.columns(2)
-                with metric_col1:
-                    st.metric("MSE", f"{quality_metrics['MSE']:.5f}", label_visibility="visible")
-                    st.metric("KS Stat", f"{quality_metrics['KS Statistic']:.5f}", label_visibility="visible")
-                with metric_col2:
-                    st.metric("Max Err", f"{quality_metrics['Max Error']:.5f}", label_visibility="visible")
-                    st.metric("p-value", f"{quality_metrics['KS p-value']:.5f}", label_visibility="visible")
+                try:
+                    with stage('manual score'):
+                        quality_metrics = calculate_fit_quality(data, dist_obj, manual_params, data_summary)
+                    
+                    show_fit_quality(quality_metrics)
                 
-                # Interpretation
-                if quality_metrics['KS p-value'] > 0.05:
-                    st.success("Good fit (p > 0.05)")
-                else:
-                    st.warning("Poor fit (p < 0.05)")
-            else:
-                st.error("Failed to fit distribution.")
-        
-        with viz_col:
-            if params is not None:
+                except Exception as e:
+                    st.error(f"Invalid parameters: {e}")
+            
+            with viz_col:
                 # Plot
                 st.markdown("<p style='font-weight:500; font-size:1.1rem; color:#f0f0f0; margin-bottom:0.5rem;'>Visualization</p>", unsafe_allow_html=True)
-                fig, ax = plt.subplots(figsize=(10, 7))
-                plot_distribution(data, dist_obj, params, selected_dist, ax)
-                st.pyplot(fig)
-                plt.close()
-                
-                # Author credit
-                st.markdown("<p style='text-align:right; color:#7f8c8d; font-size:0.85rem; margin-top:0.5rem;'>Built by Prisca Chien 21178781</p>", unsafe_allow_html=True)
-            else:
-                st.info("Select a distribution to see the fitted results")
+                try:
+                    with stage('manual plot'):
+                        show_distribution_plot('manual_figure', dist_obj, manual_params, manual_dist,
+                                               data_summary, interactive_charts)
+                    
+                    # Author credit
+                    st.markdown("<p style='text-align:right; color:#7f8c8d; font-size:0.85rem; margin-top:0.5rem;'>Built by Prisca Chien 21178781</p>", unsafe_allow_html=True)
+                except Exception as e:
+                    st.error(f"Unable to plot: {e}")
+    
     
-    # Tab 2: Manual Fitting
-    with tab2:
-        st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Manual Distribution Fitting</p>", unsafe_allow_html=True)
-        st.markdown("Adjust the parameters manually using sliders and see the fit in real-time")
+    # ========================================================================
+    # AUTOMATIC FITTING SECTION
+    # ========================================================================
+    
+    if data is not None and len(data) > 0:
+        # Browser-side charts skip matplotlib rasterization on every rerun
+        interactive_charts = st.toggle(
+            "Interactive charts",
+            key='interactive_charts',
+            help="Draw plots in the browser from precomputed bins. Faster while dragging sliders."
+        )
         
-        # Create layout: controls on left, visualization on right
-        control_col, viz_col = st.columns([1, 2])
+        tab1, tab2, tab3 = st.tabs(["Automatic Fitting", "Manual Fitting", "Fit All"])
         
-        with control_col:
-            # Distribution selection
-            manual_dist = st.selectbox(
-                "Select distribution:",
-                list(DISTRIBUTIONS.keys()),
-                key='manual_dist',
-                help="Choose a distribution to fit manually"
-            )
-            
-            dist_info = DISTRIBUTIONS[manual_dist]
-            dist_obj = dist_info['dist']
-            param_names = dist_info['params']
-            
-            # Get automatic fit as starting point
-            auto_params = fit_distribution(data, dist_obj)
+        # Tab 1: Automatic Fitting
+        with tab1:
+            st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Automatic Distribution Fitting</p>", unsafe_allow_html=True)
             
-            st.markdown("---")
+            # Create layout: controls on left, visualization on right
+            control_col, viz_col = st.columns([1, 2])
             
-            # Create sliders for each parameter
-            st.markdown("<p style='font-weight:500; font-size:1.1rem; color:#f0f0f0; margin-bottom:0.5rem;'>Adjust Parameters</p>", unsafe_allow_html=True)
-            
-            manual_params = []
-            
-            # Determine reasonable ranges for sliders
-            data_min, data_max = np.min(data), np.max(data)
-            data_range = data_max - data_min
-            data_std = np.std(data)
-            
-            for i, param_name in enumerate(param_names):
-                # Set default value from auto-fit if available
-                default_val = auto_params[i] if auto_params is not None else 1.0
+            with control_col:
+                # Distribution selection
+                selected_dist = st.selectbox(
+                    "Select distribution:",
+                    list(DISTRIBUTIONS.keys()),
+                    help="Choose a distribution to fit to your data",
+                    key='auto_dist'
+                )
                 
-                # Set reasonable ranges based on parameter type
-                if param_name in ['loc']:
-                    min_val = data_min - data_range
-                    max_val = data_max + data_range
-                    step = 0.1
-                    default_val = round(default_val, 1)
-                elif param_name in ['scale']:
-                    min_val = 0.01
-                    max_val = data_range * 2
-                    step = 0.1
-                    default_val = max(0.1, round(default_val, 1))
-                elif param_name in ['a', 'b', 'c', 's', 'df']:
-                    min_val = 0.1
-                    max_val = 10.0
-                    step = 0.1
-                    default_val = max(0.1, min(10.0, default_val))
-                else:
-                    min_val = 0.1
-                    max_val = 10.0
-                    step = 0.1
-                    default_val = max(0.1, min(10.0, default_val))
+                st.markdown("---")
                 
-                value = st.slider(
-                    param_name,
-                    min_value=float(min_val),
-                    max_value=float(max_val),
-                    value=float(default_val),
-                    step=float(step),
-                    format="%.2f" if param_name in ['loc', 'scale'] else "%.3f"
+                # Binned likelihood trades a small bias for O(bins) fit cost
+                binned_fit = st.toggle(
+                    "Binned likelihood fit",
+                    key='binned_fit',
+                    help=f"Fit to about √n histogram bins (at most {BINNED_FIT_BINS}) instead of every point. "
+                         f"Much faster for very large samples; under {BINNED_FIT_MIN_POINTS:,} points "
+                         "the exact fit is used."
                 )
-                manual_params.append(value)
+                fit_options = {'method': 'binned'} if binned_fit else {}
+                
+                # Fit the distribution
+                dist_info = DISTRIBUTIONS[selected_dist]
+                dist_obj = dist_info['dist']
+                
+                with stage(f'fit[{selected_dist}]', cached=True):
+                    params, fit_error = fit_distribution(data, selected_dist, 'auto', **fit_options)
+                
+                if params is not None:
+                    st.markdown("<p style='font-weight:500; font-size:1.1rem; color:#f0f0f0; margin-bottom:0.5rem;'>Fitted Parameters</p>", unsafe_allow_html=True)
+                    param_names = dist_info['params']
+                    
+                    # Create a nice table for parameters
+                    param_data = []
+                    for i, (name, value) in enumerate(zip(param_names, params)):
+                        param_data.append({'Parameter': name, 'Value': f'{value:.6f}'})
+                    
+                    st.table(pd.DataFrame(param_data))
+                    
+                    # Percentile intervals from refitting resamples on the process pool
+                    if st.checkbox("Bootstrap confidence intervals", key='bootstrap'):
+                        show_bootstrap_intervals(data, dist_obj, params, param_names, fit_options)
+                    
+                    # Report how far the binned estimate is from the exact MLE
+                    if binned_fit and st.checkbox("Compare with exact fit", key='binned_bias'):
+                        with stage(f'exact fit[{selected_dist}]', cached=True):
+                            exact_params, exact_error = fit_distribution(data, selected_dist, 'exact')
+                        if exact_params is not None:
+                            bias = np.subtract(params, exact_params)
+                            st.table(pd.DataFrame({
+                                'Parameter': param_names,
+                                'Exact': [f'{v:.6f}' for v in exact_params],
+                                'Bias': [f'{v:+.6f}' for v in bias],
+                                'Bias %': [f'{100 * b / e:+.3f}%' if e != 0 else '-'
+                                           for b, e in zip(bias, exact_params)]
+                            }))
+                        else:
+                            st.error(f"Exact fit failed: {exact_error}")
+                    
+                    st.markdown("---")
+                    
+                    # Display fit quality metrics
+                    with stage('score', cached=True):
+                        quality_metrics = get_fit_quality(data, selected_dist, params, fit_options, data_summary)
+                    st.markdown("<p style='font-weight:500; font-size:1.1rem; color:#f0f0f0; margin-bottom:0.5rem;'>Fit Quality</p>", unsafe_allow_html=True)
+                    
+                    show_fit_quality(quality_metrics)
+                    
+                    # Interpretation: every test must accept the fit
+                    rejected = engine.rejecting_tests(quality_metrics)
+                    if not rejected:
+                        st.success(f"Good fit (KS, Anderson-Darling and Cramer-von Mises pass at {engine.FIT_ALPHA:.0%})")
+                    else:
+                        st.warning(f"Poor fit ({', '.join(rejected)} reject at {engine.FIT_ALPHA:.0%})")
+                else:
+                    st.error(f"Failed to fit distribution: {fit_error}")
             
-            st.markdown("---")
+            with viz_col:
+                if params is not None:
+                    # Plot
+                    st.markdown("<p style='font-weight:500; font-size:1.1rem; color:#f0f0f0; margin-bottom:0.5rem;'>Visualization</p>", unsafe_allow_html=True)
+                    with stage('plot'):
+                        show_distribution_plot('auto_figure', dist_obj, params, selected_dist,
+                                               data_summary, interactive_charts)
+                    
+                    # Author credit
+                    st.markdown("<p style='text-align:right; color:#7f8c8d; font-size:0.85rem; margin-top:0.5rem;'>Built by Prisca Chien 21178781</p>", unsafe_allow_html=True)
+                else:
+                    st.info("Select a distribution to see the fitted results")
+        
+        # Tab 2: Manual Fitting
+        with tab2:
+            st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Manual Distribution Fitting</p>", unsafe_allow_html=True)
+            st.markdown("Adjust the parameters manually using sliders and see the fit in real-time")
             
-            # Display fit quality metrics in lower left
-            st.markdown("<p style='font-weight:500; font-size:1.1rem; color:#f0f0f0; margin-bottom:0.5rem;'>Fit Quality</p>", unsafe_allow_html=True)
+            manual_fitting_fragment(data, data_summary, fit_options, interactive_charts)
+        
+        # Tab 3: Fit all distributions and rank them
+        with tab3:
+            st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Fit All Distributions</p>", unsafe_allow_html=True)
+            st.markdown("Fit every distribution in parallel and rank them by goodness of fit")
             
-            try:
-                quality_metrics = calculate_fit_quality(data, dist_obj, manual_params)
+            rank_by = st.radio("Rank by:", ["KS Statistic", "AIC", "BIC"], horizontal=True, key='rank_by')
+            race = st.toggle(
+                "Race on subsamples",
+                key='race_fits',
+                help="Fit every distribution on a small random subsample, drop the worst two thirds and refit "
+                     "the rest on a three times larger one, and so on. Only the last few are fitted to all "
+                     "the data, starting from their subsample estimates."
+            )
+            
+            if st.toggle("Fit all distributions", key='fit_all'):
+                board = st.empty()
+                if race:
+                    with st.spinner("Racing distributions on subsamples..."), stage('race', cached=True):
+                        results, eliminated = race_fits(data, rank_by)
+                else:
+                    # Each fit is its own job; the leaderboard fills in as they finish
+                    with stage('fit all', cached=True):
+                        results = run_fits(data, list(DISTRIBUTIONS), {}, 'fit_all',
+                                           on_result=lambda results: show_leaderboard(board, data, results, rank_by))
+                leaderboard = show_leaderboard(board, data, results, rank_by, RACE_STORE_METHOD if race else None)
                 
-                metric_col1, metric_col2 = st.columns(2)
-                with metric_col1:
-                    st.metric("MSE", f"{quality_metrics['MSE']:.5f}", label_visibility="visible")
-                    st.metric("KS Stat", f"{quality_metrics['KS Statistic']:.5f}", label_visibility="visible")
-                with metric_col2:
-                    st.metric("Max Err", f"{quality_metrics['Max Error']:.5f}", label_visibility="visible")
-                    st.metric("p-value", f"{quality_metrics['KS p-value']:.5f}", label_visibility="visible")
-                    
-            except Exception as e:
-                st.error(f"Invalid parameters: {e}")
-        
-        with viz_col:
-            # Plot
-            st.markdown("<p style='font-weight:500; font-size:1.1rem; color:#f0f0f0; margin-bottom:0.5rem;'>Visualization</p>", unsafe_allow_html=True)
-            try:
-                fig, ax = plt.subplots(figsize=(10, 7))
-                plot_distribution(data, dist_obj, manual_params, manual_dist, ax)
-                st.pyplot(fig)
-                plt.close()
+                if race and len(eliminated):
+                    with st.expander(f"{len(eliminated)} distribution(s) eliminated on subsamples"):
+                        st.dataframe(eliminated.style.format({rank_by: '{:.5f}'}, na_rep='failed'),
+                                     use_container_width=True, hide_index=True)
                 
-                # Author credit
-                st.markdown("<p style='text-align:right; color:#7f8c8d; font-size:0.85rem; margin-top:0.5rem;'>Built by Prisca Chien 21178781</p>", unsafe_allow_html=True)
-            except Exception as e:
-                st.error(f"Unable to plot: {e}")
-
-else:
-    # No data loaded
-    st.info("Please enter or upload data using the sidebar to get started")
-    
-    # Show example
-    st.markdown("---")
-    st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Example Usage</p>", unsafe_allow_html=True)
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("**Manual Entry:**")
-        st.code("5.2 6.1 5.8 7.2 6.5 5.9 6.8 7.1", language=None)
-        st.markdown("Or use commas:")
-        st.code("5.2, 6.1, 5.8, 7.2, 6.5, 5.9", language=None)
+                failures = {name: error for name, (params, error) in results.items() if error is not None}
+                if failures:
+                    with st.expander(f"{len(failures)} distribution(s) failed to fit"):
+                        for name, error in failures.items():
+                            st.markdown(f"**{name}:** {error}")
+                
+                best = leaderboard.iloc[0]
+                if np.isfinite(best[rank_by]):
+                    st.success(f"Best fit: {best['Distribution']} ({rank_by} = {best[rank_by]:.5f})")
     
-    with col2:
-        st.markdown("**CSV Format:**")
-        st.code("""value
+    elif stream is None:
+        # No data loaded
+        st.info("Please enter or upload data using the sidebar to get started")
+        
+        # Show example
+        st.markdown("---")
+        st.markdown("<p style='font-weight:500; font-size:1.6rem; color:#e94560; margin-top:1.5rem; margin-bottom:1.5rem; border-left:4px solid #e94560; padding-left:1rem; letter-spacing:2px;'>Example Usage</p>", unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("**Manual Entry:**")
+            st.code("5.2 6.1 5.8 7.2 6.5 5.9 6.8 7.1", language=None)
+            st.markdown("Or use commas:")
+            st.code("5.2, 6.1, 5.8, 7.2, 6.5, 5.9", language=None)
+        
+        with col2:
+            st.markdown("**CSV Format:**")
+            st.code("""value
 5.2
 6.1
 5.8
 7.2
 6.5""", language=None)
+
+# Optional per-session cProfile of the page body, switched on from the Diagnostics panel
+profile_path = os.path.join(PROFILE_DIR, f"{session_id}.prof")
+if st.session_state.get('profile_reruns'):
+    with profile_run(st.session_state.setdefault('profiler', cProfile.Profile()),
+                     profile_path) as profiled:
+        render_page()
+else:
+    profiled = None
+    render_page()
+
+# ============================================================================
+# DIAGNOSTICS SECTION
+# ============================================================================
+
+st.markdown("---")
+
+with st.expander("Diagnostics"):
+    st.markdown("**Stage timings for this rerun:**")
+    if rerun_timer.stages:
+        timings = pd.DataFrame(rerun_timer.stages).rename(
+            columns={'stage': 'Stage', 'ms': 'Time (ms)', 'cache': 'Cache'})
+        st.dataframe(timings.style.format({'Time (ms)': '{:.1f}'}, na_rep='-'),
+                     use_container_width=True, hide_index=True)
+    st.caption(f"Rerun time before this panel: {rerun_timer.elapsed_ms:.0f} ms (session {session_id})")
+    
+    st.toggle(
+        "Profile reruns",
+        key='profile_reruns',
+        help=f"Accumulate a cProfile dump for this session in {PROFILE_DIR}/. "
+             "Open it with pstats, snakeviz or flameprof."
+    )
+    if profiled is False:
+        st.caption("Another session or tool is profiling this server process, "
+                   "so this rerun was not profiled.")
+    if os.path.exists(profile_path):
+        with open(profile_path, 'rb') as f:
+            st.download_button("Download profile", f.read(), file_name=f"{session_id}.prof")
+
+rerun_timer.finish()
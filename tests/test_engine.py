@@ -0,0 +1,164 @@
+"""Tests for the headless fitting engine and its fit job queue
+
+Run from the repository root with `python -m pytest`.
+"""
+import io
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import pytest
+
+import fitting_engine as engine
+from fit_jobs import FitJobQueue
+
+def _sleeping_optimizer(func, x0, args=(), disp=0):
+    # Stands in for an optimizer that never converges
+    time.sleep(60)
+    return x0
+
+# ============================================================================
+# PARSING
+# ============================================================================
+
+def test_parse_data_accepts_commas_and_whitespace():
+    values = engine.parse_data("1, 2.5\n-3e2\t4,5")
+    np.testing.assert_array_equal(values, [1.0, 2.5, -300.0, 4.0, 5.0])
+    assert values.dtype == np.float64
+
+def test_parse_data_empty_input():
+    assert len(engine.parse_data("  ,\n ")) == 0
+
+def test_parse_data_reports_first_bad_token():
+    with pytest.raises(engine.DataParseError) as info:
+        engine.parse_data("1, 2, x3, 4, y")
+    assert info.value.token == 'x3'
+    assert info.value.offset == 6
+    assert isinstance(info.value, ValueError)
+
+# ============================================================================
+# WEIGHTED DATA
+# ============================================================================
+
+@pytest.mark.parametrize('dist_name', ['Normal', 'Gamma', 'Weibull'])
+def test_weighted_metrics_match_expanded_sample(dist_name):
+    rng = np.random.default_rng(0)
+    data = np.round(rng.gamma(4.0, 2.0, 5000), 1)
+    weighted = engine.compact_data(data)
+    assert len(weighted) == len(data) and len(weighted.values) < len(data)
+    
+    dist_obj = engine.DISTRIBUTIONS[dist_name]['dist']
+    params = engine.fit_distribution(data, dist_obj)
+    expected = engine.calculate_fit_quality(data, dist_obj, params)
+    actual = engine.calculate_fit_quality(weighted, dist_obj, params)
+    assert actual.keys() == expected.keys()
+    for name, value in expected.items():
+        assert actual[name] == pytest.approx(value, rel=1e-9, abs=1e-12), name
+
+def test_weighted_merge_matches_compacting_everything():
+    rng = np.random.default_rng(1)
+    first, second = rng.integers(0, 50, 1000), rng.integers(25, 75, 1000)
+    merged = engine.compact_data(first).merge(engine.compact_data(second))
+    np.testing.assert_array_equal(merged.expand(), np.sort(np.concatenate([first, second])))
+
+# ============================================================================
+# STREAMING HISTOGRAM
+# ============================================================================
+
+def test_streaming_histogram_matches_np_histogram():
+    rng = np.random.default_rng(2)
+    batches = [rng.normal(0, 1, 1000), rng.normal(5, 10, 1000), rng.uniform(-200, 400, 1000)]
+    histogram = engine.StreamingHistogram(max_bins=64)
+    for batch in batches:
+        histogram.update(batch)
+    
+    counts, _ = np.histogram(np.concatenate(batches), bins=histogram.edges)
+    np.testing.assert_array_equal(histogram.counts, counts)
+    assert len(histogram.counts) <= 64
+    assert histogram.counts.sum() == 3000
+
+def test_streaming_histogram_density_integrates_to_one():
+    histogram = engine.StreamingHistogram(max_bins=200)
+    histogram.update(np.random.default_rng(3).exponential(2.0, 5000))
+    edges, density = histogram.density(max_bins=30)
+    assert len(density) <= 30
+    assert np.sum(density * np.diff(edges)) == pytest.approx(1.0)
+
+# ============================================================================
+# BINARY FILES
+# ============================================================================
+
+COLUMNS = {
+    'x': np.array([1.5, -2.0, np.nan, 4.25, 8.0]),
+    'n': np.array([3, 1, 4, 1, 5], dtype=np.int64),
+}
+
+def _write_npy(path):
+    array = np.empty(5, dtype=[('x', np.float64), ('n', np.int64)])
+    array['x'], array['n'] = COLUMNS['x'], COLUMNS['n']
+    np.save(path, array)
+
+def _write_parquet(path):
+    pq.write_table(pa.table(COLUMNS), path)
+
+def _write_arrow(path):
+    feather.write_feather(pa.table(COLUMNS), path)
+
+@pytest.mark.parametrize('suffix, write', [('.npy', _write_npy), ('.parquet', _write_parquet),
+                                           ('.arrow', _write_arrow)])
+@pytest.mark.parametrize('in_memory', [False, True])
+def test_read_binary_columns_round_trip(tmp_path, suffix, write, in_memory):
+    path = tmp_path / f"data{suffix}"
+    write(path)
+    kind = engine.binary_format(path.name)
+    source = io.BytesIO(path.read_bytes()) if in_memory else path
+    
+    assert set(engine.binary_columns(source, kind)) == {'x', 'n'}
+    result = engine.read_binary_columns(source, kind, ['x', 'n'])
+    for column, expected in COLUMNS.items():
+        values, stats = result[column]
+        expected = expected[~np.isnan(expected)].astype(np.float64)
+        assert values.dtype == np.float64
+        np.testing.assert_array_equal(values, expected)
+        assert stats.count == len(expected)
+        assert stats.mean == pytest.approx(np.mean(expected))
+        assert stats.std == pytest.approx(np.std(expected))
+
+def test_read_binary_columns_unknown_format():
+    with pytest.raises(ValueError):
+        engine.read_binary_columns(io.BytesIO(b''), 'xlsx', ['x'])
+
+# ============================================================================
+# FIT JOBS
+# ============================================================================
+
+def test_fit_job_times_out_and_frees_its_slot():
+    data = np.random.default_rng(4).gamma(2.0, 1.0, 200)
+    queue = FitJobQueue(timeout=0.5)
+    try:
+        slow = queue.submit('slow', data, engine.DISTRIBUTIONS['Gamma']['dist'],
+                            {'optimizer': _sleeping_optimizer})
+        queue.wait(['slow'])
+        assert slow.status == 'timeout'
+        assert slow.params is None and 'Timed out' in slow.error
+        assert slow.elapsed < 10
+        
+        fast = queue.submit('fast', data, engine.DISTRIBUTIONS['Normal']['dist'])
+        queue.wait(['fast'])
+        assert fast.status == 'done'
+        assert fast.params == pytest.approx((np.mean(data), np.std(data)))
+    finally:
+        queue.close()
+
+def test_fit_job_timeout_can_be_set_per_job():
+    data = np.random.default_rng(5).gamma(2.0, 1.0, 200)
+    queue = FitJobQueue(timeout=60)
+    try:
+        job = queue.submit('slow', data, engine.DISTRIBUTIONS['Gamma']['dist'],
+                           {'optimizer': _sleeping_optimizer}, timeout=0.5)
+        queue.wait(['slow'])
+        assert job.status == 'timeout'
+    finally:
+        queue.close()